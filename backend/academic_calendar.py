@@ -0,0 +1,74 @@
+"""Academic year calculations with an injectable clock.
+
+Year of study and years until graduation only change when the academic year
+rolls over, so they are tabulated once per academic year for every timeline
+the survey form offers.
+"""
+from datetime import date
+
+# The frontend treats dates from June onwards as the new academic year
+ROLLOVER_MONTH = 6
+# Start and graduation years are tabulated from ten years before the current
+# academic year to ten years after it; others are calculated on demand
+TIMELINE_YEARS_BEFORE = 10
+TIMELINE_YEARS_AFTER = 10
+
+
+class AcademicYear:
+    """Year-of-study math for one academic year.
+
+    A request should take one ``AcademicYear`` and use it throughout, so its
+    answers stay consistent even if it runs across midnight or a rollover.
+    """
+
+    def __init__(self, year):
+        self.year = year
+        years = range(year - TIMELINE_YEARS_BEFORE, year + TIMELINE_YEARS_AFTER + 1)
+        self._timelines = {
+            (start_year, graduation_year, has_placement): self._calculate(start_year, graduation_year, has_placement)
+            for start_year in years
+            for graduation_year in years
+            for has_placement in (False, True)
+        }
+
+    def timeline(self, start_year, graduation_year, has_placement):
+        """Return ``(year_of_study, years_until_grad)`` for a degree timeline."""
+        has_placement = bool(has_placement)
+        result = self._timelines.get((start_year, graduation_year, has_placement))
+        if result is None:
+            result = self._calculate(start_year, graduation_year, has_placement)
+        return result
+
+    def years_until_graduation(self, graduation_year):
+        return graduation_year - self.year - 1
+
+    def _calculate(self, start_year, graduation_year, has_placement):
+        years_since_start = self.year - start_year
+        total_duration = graduation_year - start_year
+
+        # Four-year degrees with a placement year
+        if has_placement and total_duration == 4 and years_since_start in (2, 3):
+            # On placement (year 3) or in the final year after it (year 4)
+            year_of_study = years_since_start + 1
+        else:
+            # Keep year of study within reasonable bounds
+            year_of_study = min(max(years_since_start + 1, 1), total_duration)
+
+        return year_of_study, self.years_until_graduation(graduation_year)
+
+
+class AcademicCalendar:
+
+    def __init__(self, clock=date.today):
+        self.clock = clock
+        self._current = None
+
+    def current(self):
+        """Return the ``AcademicYear`` for today, rebuilding it after a rollover."""
+        today = self.clock()
+        year = today.year - 1 if today.month < ROLLOVER_MONTH else today.year
+
+        current = self._current
+        if current is None or current.year != year:
+            current = self._current = AcademicYear(year)
+        return current
@@ -0,0 +1,221 @@
+"""Flask API serving the survey steps and eligibility recommendations."""
+import functools
+import hmac
+import json
+import secrets
+import threading
+
+from flask import Flask, Response, after_this_request, jsonify, request, stream_with_context
+from flask_cors import CORS
+from itsdangerous import BadSignature
+
+from batch import evaluate_records, parse_text_fields, read_records
+from metrics import CONTENT_TYPE, SamplingProfiler, SurveyMetrics
+from survey_constants import StepType
+from survey_flow import answer_options, build_flow_graph
+from survey_processor import SurveyProcessor
+from survey_token import SurveyTokenSerializer
+
+app = Flask(__name__)
+# Reads FLASK_SECRET_KEY, which must be shared by every worker
+app.config.from_prefixed_env()
+if not app.config.get('SECRET_KEY'):
+    app.logger.warning("FLASK_SECRET_KEY is not set; survey tokens will only be valid on this server")
+    app.config['SECRET_KEY'] = secrets.token_hex(32)
+# Commentary is shown in the order the rules list it
+app.json.sort_keys = False
+CORS(app)
+
+# Opens the compiled catalog, which is reloaded when rules/catalog.bin is replaced
+processor = SurveyProcessor()
+step_tokens = SurveyTokenSerializer(app.config['SECRET_KEY'])
+# FLASK_METRICS=false turns the request timers and counters off
+metrics = SurveyMetrics(enabled=app.config.get('METRICS', True))
+# Held while a profile is recorded, so clients can't pile up sampler threads
+_profiling = threading.Lock()
+
+
+def _survey_data():
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+
+@app.before_request
+def _start_profiler():
+    # Only honoured when FLASK_PROFILE_DIR names a directory for the profiles and
+    # the header carries FLASK_PROFILE_TOKEN
+    token = app.config.get('PROFILE_TOKEN')
+    if not (app.config.get('PROFILE_DIR') and token and 'X-Profile' in request.headers):
+        return
+    if not hmac.compare_digest(request.headers['X-Profile'].encode(), str(token).encode()):
+        return
+    if not _profiling.acquire(blocking=False):
+        return
+    profiler = SamplingProfiler(app.config['PROFILE_DIR']).start()
+
+    def stop():
+        try:
+            profiler.stop()
+        finally:
+            _profiling.release()
+
+    @after_this_request
+    def stop_profiler(response):
+        response.headers['X-Profile'] = profiler.path.name
+        # Streamed responses are still running here, so stop once they are sent
+        response.call_on_close(stop)
+        return response
+
+
+@app.route('/api/survey', methods=['GET', 'POST'])
+def submit_survey():
+    """Return the recommendation for a survey, sent as JSON or as query parameters.
+
+    Like ``/api/survey/step``, the answers may come from a step ``token``.
+
+    Responses carry a strong ETag so that GET requests can be revalidated with
+    If-None-Match and answered with 304 Not Modified.
+    """
+    stages = metrics.stopwatch()
+    fields = _survey_data() if request.method == 'POST' else parse_text_fields(request.args.to_dict())
+    try:
+        survey_data = _with_token(fields)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    stages.lap('parse')
+
+    catalog = processor.catalogs.current()
+    try:
+        key = processor.eligibility_key(survey_data)
+        stages.lap('year_of_study')
+        result_id = catalog.result_id(key)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    # The branch and its commentary are a single lookup in the compiled catalog
+    payload = catalog.payload(result_id)
+    stages.lap('lookup')
+
+    response = Response(payload, mimetype='application/json')
+    response.set_etag(catalog.etags[result_id])
+    # Recommendations depend on the current academic year, so always revalidate
+    response.cache_control.no_cache = True
+    response = response.make_conditional(request)
+    stages.lap('encode')
+    # Counted outside the timed stages, so its lock and first-use decode aren't billed to one
+    metrics.record_recommendation(catalog, key, result_id)
+    return response
+
+
+@app.get('/metrics')
+def metrics_endpoint():
+    """Return the request metrics in Prometheus text format."""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+@app.post('/api/survey/batch')
+def submit_survey_batch():
+    """Evaluate a CSV or JSONL upload, streaming one NDJSON line per record."""
+    fmt = 'csv' if request.mimetype == 'text/csv' else 'jsonl'
+    records = read_records(request.stream, fmt)
+    return Response(stream_with_context(evaluate_records(processor, records)), mimetype='application/x-ndjson')
+
+
+@app.get('/api/career-paths')
+def career_paths():
+    """Return the description of each career path tab from the current catalog."""
+    catalog = processor.catalogs.current()
+    response = Response(catalog.career_paths(), mimetype='application/json')
+    response.set_etag(catalog.version)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@app.post('/api/survey/step')
+def survey_step():
+    """Return the next (or previous) question and a token recording the progress.
+
+    Clients send the token from the last response together with only the newly
+    answered fields. Requests without a token must send the whole survey.
+    """
+    fields = _survey_data()
+    is_previous = fields.pop('is_previous', False)
+    try:
+        survey_data = _with_token(fields)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    # The response and every prefetched step use the same academic year
+    academic_year = processor.calendar.current()
+
+    try:
+        response, survey_data = _take_step(survey_data, academic_year, is_previous)
+        if 'error' not in response:
+            # Prefetch the questions one step away so the client can move
+            # forward or back without another round trip
+            response['answers'] = {
+                json.dumps(value) if isinstance(value, bool) else value:
+                    _take_step({**survey_data, field: value}, academic_year)[0]
+                for field, value in answer_options(response)
+            }
+            if response['next_step'] not in (StepType.WELCOME, StepType.FINAL):
+                response['previous'] = _take_step(survey_data, academic_year, is_previous=True)[0]
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    return jsonify(response)
+
+
+def _with_token(fields):
+    """Return the answers recorded in ``fields['token']``, updated with the other fields."""
+    token = fields.pop('token', None)
+    try:
+        if token is not None and not isinstance(token, str):
+            raise ValueError("Survey token must be a string")
+        survey_data = step_tokens.loads(token) if token else {}
+    except (BadSignature, ValueError):
+        raise ValueError("Invalid survey token") from None
+    survey_data.update(fields)
+    return survey_data
+
+
+def _take_step(survey_data, academic_year, is_previous=False):
+    # The processor records some answers itself, such as the experience a
+    # converted spring week brings, so the token packs its copy
+    survey_data = {**survey_data, 'is_previous': is_previous}
+    response = processor.get_next_step(survey_data, academic_year)
+    del survey_data['is_previous']
+    survey_data['current_step'] = response['next_step']
+    response['token'] = step_tokens.dumps(survey_data)
+    return response, survey_data
+
+
+@functools.cache
+def _flow_graph():
+    graph = build_flow_graph(processor)
+    return graph['version'], json.dumps(graph, separators=(',', ':')).encode()
+
+
+@app.get('/api/survey/flow')
+def survey_flow():
+    """Return the survey flow graph; clients should revalidate it."""
+    version, payload = _flow_graph()
+    response = Response(payload, mimetype='application/json')
+    response.set_etag(version)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@app.get('/api/survey/flow/<version>.json')
+def survey_flow_version(version):
+    """Return one version of the flow graph, which never changes once published."""
+    current_version, payload = _flow_graph()
+    if version != current_version:
+        return jsonify(error="Unknown flow graph version"), 404
+    response = Response(payload, mimetype='application/json')
+    response.set_etag(version)
+    response.cache_control.public = True
+    response.cache_control.max_age = 365 * 24 * 60 * 60
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,136 @@
+"""Batch eligibility evaluation for CSV and JSONL survey exports.
+
+Records are streamed in and results streamed out as NDJSON, one line per input
+record in the same order, so memory use does not grow with the input size.
+
+Usage: python batch.py students.csv -o results.ndjson
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import sys
+
+from survey_processor import SurveyProcessor
+
+CHUNK_SIZE = 4096
+BOOLEAN_FIELDS = ('has_placement', 'has_experience', 'has_grad_offer', 'has_spring_weeks', 'converted_spring_to_internship')
+_TRUE_STRINGS = frozenset(('true', '1', 'yes', 'y'))
+_decode_json = json.JSONDecoder().decode
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = _decode_json(line.decode())
+        except ValueError as error:
+            yield ValueError(f"Invalid JSON: {error}")
+            continue
+        yield record if isinstance(record, dict) else ValueError("Record must be a JSON object")
+
+
+def read_csv(stream):
+    # Bytes that aren't UTF-8 become surrogates, so only their row is rejected
+    rows = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', errors='surrogateescape', newline=''),
+                      strict=True)
+    header = boolean_columns = None
+
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            yield ValueError(f"Invalid CSV: {error}")
+            continue
+
+        if header is None:
+            header = row
+            boolean_columns = [index for index, field in enumerate(header) if field in BOOLEAN_FIELDS]
+            continue
+        if not row:
+            continue
+        if not all(map(str.isascii, row)) and not _is_utf8(row):
+            yield ValueError("Invalid UTF-8 in CSV row")
+            continue
+
+        # Blank answers are left as '', which the rules treat like missing ones
+        for index in boolean_columns:
+            if index < len(row):
+                row[index] = row[index].strip().lower() in _TRUE_STRINGS
+        yield dict(zip(header, row))
+
+
+def _is_utf8(row):
+    try:
+        ''.join(row).encode()
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def parse_text_fields(fields):
+    """Build a survey record from text fields such as a CSV row or query string."""
+    # Unanswered questions are left blank and booleans are spelled out
+    record = {field: value if value != '' else None for field, value in fields.items()}
+    for field in BOOLEAN_FIELDS:
+        value = record.get(field)
+        if value is not None:
+            record[field] = value.strip().lower() in _TRUE_STRINGS
+    return record
+
+
+def evaluate_records(processor, records):
+    """Yield NDJSON chunks with one result or error line per record."""
+    catalog = result_lines = None
+    # One academic year for the whole batch, even if it runs past a rollover
+    academic_year = processor.calendar.current()
+    records = iter(records)
+
+    while True:
+        chunk = list(itertools.islice(records, CHUNK_SIZE))
+        if not chunk:
+            return
+
+        lines = []
+        # Each chunk sticks to one catalog, picking up a reloaded one between chunks
+        current = processor.catalogs.current()
+        if current is not catalog:
+            catalog = current
+            result_lines = [catalog.payload(result_id) + b'\n' for result_id in range(catalog.result_count)]
+        for record in chunk:
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                lines.append(result_lines[catalog.result_id(processor.eligibility_key(record, academic_year))])
+            except ValueError as error:
+                lines.append(json.dumps({'error': str(error)}, separators=(',', ':')).encode() + b'\n')
+        yield b''.join(lines)
+
+
+def read_records(stream, fmt):
+    return read_csv(stream) if fmt == 'csv' else read_jsonl(stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate eligibility for a CSV or JSONL export of survey responses.")
+    parser.add_argument('input', help="CSV or JSONL file of survey records, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="NDJSON output file (default: stdout)")
+    parser.add_argument('--format', choices=('csv', 'jsonl'),
+                        help="input format (default: from the file extension, otherwise jsonl)")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    target = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+
+    with source, target:
+        for chunk in evaluate_records(SurveyProcessor(), read_records(source, fmt)):
+            target.write(chunk)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+"""Latency and throughput benchmarks for the survey API.
+
+Replays a synthetic population covering every sector, education stage and
+form timeline against /api/survey and /api/survey/step. It runs in-process
+via the Flask test client, then over HTTP through a local WSGI server and
+through serve.py, with ``--concurrency`` clients sending requests at once.
+The in-process run is repeated with metrics disabled, and the cost of the
+disabled instrumentation hooks is checked against a budget.
+
+Usage (from the backend directory):
+    python benchmarks/bench_survey.py
+    python benchmarks/bench_survey.py --concurrency 16 --save benchmarks/baseline.json
+    python benchmarks/bench_survey.py --concurrency 16 --compare benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import http.client
+import itertools
+import json
+import logging
+import os
+import random
+import resource
+import signal
+import socket
+import sys
+import threading
+import time
+import timeit
+import traceback
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+import app as survey_app  # noqa: E402
+import serve  # noqa: E402
+from academic_calendar import AcademicCalendar  # noqa: E402
+from metrics import SurveyMetrics  # noqa: E402
+from survey_constants import EducationStage, Sector, StepType  # noqa: E402
+from survey_flow import survey_states  # noqa: E402
+
+STEPS = (StepType.WELCOME, StepType.SECTOR, StepType.EDUCATION_STAGE, StepType.UNIVERSITY_TIMELINE,
+         StepType.SPRING_WEEKS, StepType.SPRING_CONVERSION, StepType.INTERNSHIP_EXPERIENCE, StepType.GRAD_OFFER)
+# A scenario regresses when its p95/p99 latency or the peak RSS rises, or its
+# throughput falls, by more than this fraction of the baseline
+DEFAULT_TOLERANCE = 0.2
+# Disabled metrics and profiler hooks may cost at most this fraction of a
+# median /api/survey request
+MAX_DISABLED_OVERHEAD = 0.01
+STAGES = ('parse', 'year_of_study', 'lookup', 'encode')
+
+
+def generate_population(today, seed=0):
+    """Return survey answers for every sector, stage and form timeline, shuffled."""
+    population = list(survey_states(today))
+    random.Random(seed).shuffle(population)
+    return population
+
+
+def _requests(population, count):
+    """Yield ``count`` (path, body) pairs alternating over the population."""
+    steps = itertools.cycle(STEPS)
+    for survey_data in itertools.islice(itertools.cycle(population), count):
+        yield '/api/survey', json.dumps(survey_data).encode()
+        yield '/api/survey/step', json.dumps({**survey_data, 'current_step': next(steps)}).encode()
+
+
+def _run(name, client, population, count, concurrency=1):
+    """Send ``count`` requests to each endpoint from ``concurrency`` clients at once.
+
+    ``client`` is a context manager yielding a ``send(path, body)`` function
+    that returns the response status; each client thread opens its own.
+    """
+    requests = _requests(population, count)
+    lock = threading.Lock()
+    latencies = {'/api/survey': [], '/api/survey/step': []}
+    errors = []
+    failures = []
+
+    def run_client():
+        try:
+            with client() as send:
+                while True:
+                    with lock:
+                        request = next(requests, None)
+                    if request is None:
+                        return
+                    path, body = request
+                    request_started = time.perf_counter_ns()
+                    status = send(path, body)
+                    latencies[path].append(time.perf_counter_ns() - request_started)
+                    if status >= 500:
+                        errors.append(status)
+        except BaseException as error:
+            failures.append(error)
+
+    threads = [threading.Thread(target=run_client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if failures:
+        raise failures[0]
+
+    samples = sorted(itertools.chain.from_iterable(latencies.values()))
+    # Throughput is only meaningful for the scenario as a whole, since the
+    # endpoints' requests are interleaved on the same clients
+    results = {f'{name} total': {
+        'requests': len(samples),
+        'concurrency': concurrency,
+        **_latency_percentiles(samples),
+        'requests_per_sec': round(len(samples) / elapsed, 1),
+    }}
+    for path, samples in latencies.items():
+        samples.sort()
+        results[f'{name} {path}'] = {
+            'requests': len(samples), 'concurrency': concurrency, **_latency_percentiles(samples),
+        }
+    if errors:
+        print(f"{name}: {len(errors)} requests failed with a server error", file=sys.stderr)
+    return results
+
+
+def _latency_percentiles(sorted_samples):
+    return {f'p{percentile}_ms': _percentile(sorted_samples, percentile) for percentile in (50, 95, 99)}
+
+
+def _percentile(sorted_samples, percentile):
+    index = min(len(sorted_samples) - 1, round(percentile / 100 * (len(sorted_samples) - 1)))
+    return round(sorted_samples[index] / 1e6, 4)
+
+
+@contextlib.contextmanager
+def _test_client():
+    client = survey_app.app.test_client()
+    yield lambda path, body: client.post(path, data=body, content_type='application/json').status_code
+
+
+@contextlib.contextmanager
+def _http_client(port):
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+
+    def send(path, body):
+        connection.request('POST', path, body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    try:
+        yield send
+    finally:
+        connection.close()
+
+
+def bench_in_process(population, count):
+    return _run('test client', _test_client, population, count)
+
+
+def bench_metrics_off(population, count):
+    survey_app.metrics.enabled = False
+    try:
+        return _run('test client, metrics off', _test_client, population, count)
+    finally:
+        survey_app.metrics.enabled = True
+
+
+def instrumentation_ns(enabled, number=100_000):
+    """Return what the metrics and profiler hooks cost per request, in nanoseconds."""
+    metrics = SurveyMetrics(enabled=enabled)
+    catalog = survey_app.processor.catalogs.current()
+    key = survey_app.processor.eligibility_key({'sector': Sector.FINANCE, 'education_stage': EducationStage.GRADUATE})
+    result_id = catalog.result_id(key)
+
+    def hooks():
+        survey_app._start_profiler()
+        stages = metrics.stopwatch()
+        for stage in STAGES:
+            stages.lap(stage)
+        metrics.record_recommendation(catalog, key, result_id)
+
+    app = survey_app.app
+    profile_dir = app.config.pop('PROFILE_DIR', None)
+    try:
+        with app.test_request_context('/api/survey', method='POST', headers={'X-Profile': '1'}):
+            return round(min(timeit.repeat(hooks, number=number, repeat=5)) / number * 1e9, 1)
+    finally:
+        if profile_dir is not None:
+            app.config['PROFILE_DIR'] = profile_dir
+
+
+def bench_wsgi_server(population, count, concurrency):
+    # Keep the per-request access log out of the measurements
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, survey_app.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        return _run('wsgi server', lambda: _http_client(server.server_port), population, count, concurrency)
+    finally:
+        server.shutdown()
+
+
+def bench_serve(population, count, concurrency, workers):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    # Forked rather than run as a script, so the workers keep the pinned calendar
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            serve.main(['--port', str(port), '--workers', str(workers)])
+        except SystemExit as exit:
+            status = exit.code or 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    try:
+        _wait_for_port(pid, port)
+        return _run('serve.py', lambda: _http_client(port), population, count, concurrency)
+    finally:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+
+def _wait_for_port(pid, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            if os.waitpid(pid, os.WNOHANG)[0] or time.monotonic() > deadline:
+                raise RuntimeError(f"serve.py did not start listening on port {port}") from None
+            time.sleep(0.05)
+
+
+def compare(results, baseline, tolerance):
+    """Return a description of each scenario that regressed against ``baseline``."""
+    regressions = []
+    for scenario, expected in baseline['scenarios'].items():
+        actual = results['scenarios'].get(scenario)
+        if actual is None:
+            continue
+        if actual.get('concurrency') != expected.get('concurrency'):
+            regressions.append(f"{scenario}: concurrency {actual.get('concurrency')} differs from baseline "
+                               f"{expected.get('concurrency')}, so it can't be compared")
+            continue
+        for metric in ('p95_ms', 'p99_ms'):
+            if actual[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(f"{scenario}: {metric} {actual[metric]} > baseline {expected[metric]}")
+        if 'requests_per_sec' in expected and \
+                actual['requests_per_sec'] < expected['requests_per_sec'] * (1 - tolerance):
+            regressions.append(
+                f"{scenario}: requests_per_sec {actual['requests_per_sec']} < baseline {expected['requests_per_sec']}"
+            )
+    if results['peak_rss_mb'] > baseline['peak_rss_mb'] * (1 + tolerance):
+        regressions.append(f"peak_rss_mb {results['peak_rss_mb']} > baseline {baseline['peak_rss_mb']}")
+    return regressions
+
+
+def instrumentation_overhead(scenarios):
+    """Compare the instrumentation's cost with a median in-process /api/survey request."""
+    p50_ns = scenarios['test client, metrics off /api/survey']['p50_ms'] * 1e6
+    disabled_ns = instrumentation_ns(enabled=False)
+    enabled_ns = instrumentation_ns(enabled=True)
+    return {
+        'disabled_ns_per_request': disabled_ns,
+        'enabled_ns_per_request': enabled_ns,
+        'disabled_fraction_of_p50': round(disabled_ns / p50_ns, 5),
+        'enabled_fraction_of_p50': round(enabled_ns / p50_ns, 5),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the survey API.")
+    parser.add_argument('--requests', type=int, default=5000, help="requests per endpoint and scenario")
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help="clients sending requests at once in the HTTP scenarios (default: 1)")
+    parser.add_argument('--serve-workers', type=int, default=2,
+                        help="serve.py worker processes, or 0 to skip the serve.py scenario (default: 2)")
+    parser.add_argument('--date', type=date.fromisoformat, default=date(2026, 3, 1),
+                        help="date to pin the academic calendar to (default: 2026-03-01)")
+    parser.add_argument('--save', type=Path, help="write the results to this JSON baseline")
+    parser.add_argument('--compare', type=Path, help="fail if results regress against this JSON baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    survey_app.processor.calendar = AcademicCalendar(lambda: args.date)
+    population = generate_population(args.date)
+
+    scenarios = {}
+    scenarios.update(bench_in_process(population, args.requests))
+    scenarios.update(bench_metrics_off(population, args.requests))
+    scenarios.update(bench_wsgi_server(population, args.requests, args.concurrency))
+    if args.serve_workers:
+        scenarios.update(bench_serve(population, args.requests, args.concurrency, args.serve_workers))
+    instrumentation = instrumentation_overhead(scenarios)
+    results = {
+        'date': args.date.isoformat(),
+        'python': sys.version.split()[0],
+        'population': len(population),
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'scenarios': scenarios,
+        'instrumentation': instrumentation,
+    }
+
+    for scenario, metrics in scenarios.items():
+        throughput = f"  {metrics['requests_per_sec']:>9.1f} req/s" if 'requests_per_sec' in metrics else ''
+        print(f"{scenario:<42} p50 {metrics['p50_ms']:>8.3f} ms  p95 {metrics['p95_ms']:>8.3f} ms  "
+              f"p99 {metrics['p99_ms']:>8.3f} ms{throughput}")
+    print(f"peak RSS {results['peak_rss_mb']} MB")
+    print(f"instrumentation per request: {instrumentation['disabled_ns_per_request']} ns disabled "
+          f"({instrumentation['disabled_fraction_of_p50']:.3%} of p50), "
+          f"{instrumentation['enabled_ns_per_request']} ns enabled ({instrumentation['enabled_fraction_of_p50']:.3%})")
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + '\n')
+    regressions = []
+    if instrumentation['disabled_fraction_of_p50'] > MAX_DISABLED_OVERHEAD:
+        regressions.append(f"disabled instrumentation costs {instrumentation['disabled_fraction_of_p50']:.3%} "
+                           f"of p50, over the {MAX_DISABLED_OVERHEAD:.0%} budget")
+    if args.compare:
+        regressions += compare(results, json.loads(args.compare.read_text()), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,383 @@
+"""The recommendation catalog: sector rules and texts compiled to a binary index.
+
+``rules/catalog.json`` gives, for every sector, the outcome of each eligibility
+branch along with the commentary texts and career path descriptions. Which
+branch applies depends only on the student's timeline and answers, and is
+decided by ``eligibility_branch``; everything sector-specific is data.
+
+The compiler evaluates every eligibility key once and writes a file that maps
+each key to a result ID and each result to its JSON payload and ETag. Workers
+read that file in one go and index into the bytes, so opening it is cheap and a
+catalog loaded before forking is shared copy-on-write. ``CatalogLoader``
+reopens it when it is replaced.
+
+Usage: python catalog.py rules/catalog.json -o rules/catalog.bin
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from survey_constants import EducationStage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE = Path(__file__).resolve().parent / 'rules' / 'catalog.json'
+
+BRANCHES = (
+    'pre_university',
+    'early', 'early_placement',
+    'year_two_placement',
+    'two_years_out', 'two_years_out_placement',
+    'penultimate',
+    'final_year', 'final_year_experience', 'final_year_grad_offer',
+    'graduate', 'graduate_experience',
+)
+
+# Values each part of an eligibility key can take. Only year 2 is treated
+# specially by the rules, so 1 stands for "year 1 or earlier" and 3 for
+# "year 3 or later"; likewise -1 and 3 stand for "already graduated" and
+# "more than two years until graduation". None means not at university.
+EDUCATION_STAGES = EducationStage.ALL + (None,)
+YEAR_OF_STUDY_VALUES = (None, 1, 2, 3)
+YEARS_UNTIL_GRAD_VALUES = (None, -1, 0, 1, 2, 3)
+# is_final_year, has_placement, has_experience, has_grad_offer, has_spring_weeks
+FLAG_COUNT = 5
+
+# Keys are numbered in the order itertools.product enumerates them
+_FLAGS_STRIDE = 1 << FLAG_COUNT
+_YEARS_UNTIL_GRAD_STRIDE = _FLAGS_STRIDE
+_YEAR_OF_STUDY_STRIDE = _YEARS_UNTIL_GRAD_STRIDE * len(YEARS_UNTIL_GRAD_VALUES)
+_STAGE_STRIDE = _YEAR_OF_STUDY_STRIDE * len(YEAR_OF_STUDY_VALUES)
+_SECTOR_STRIDE = _STAGE_STRIDE * len(EDUCATION_STAGES)
+_STAGE_OFFSETS = {value: index * _STAGE_STRIDE for index, value in enumerate(EDUCATION_STAGES)}
+_YEAR_OF_STUDY_OFFSETS = {value: index * _YEAR_OF_STUDY_STRIDE for index, value in enumerate(YEAR_OF_STUDY_VALUES)}
+_YEARS_UNTIL_GRAD_OFFSETS = {value: index * _YEARS_UNTIL_GRAD_STRIDE
+                             for index, value in enumerate(YEARS_UNTIL_GRAD_VALUES)}
+
+# File layout: header, metadata JSON, one little-endian uint16 result ID per
+# key, then a directory of (offset, length, ETag) per result, the career path
+# descriptions and the result payloads.
+MAGIC = b'SURVCAT1'
+_HEADER = struct.Struct('<8sIIII')
+_DIRECTORY_ENTRY = struct.Struct('<II16s')
+# Keys no survey can produce, such as a university student with no timeline
+UNREACHABLE = 0xFFFF
+
+
+@dataclass(frozen=True)
+class EligibilityResult:
+    primary_tab: str = ''
+    secondary_tabs: tuple = ()
+    # (tab, text) pairs, kept in display order
+    commentary: tuple = ()
+
+    def to_dict(self):
+        return {
+            'primary_tab': self.primary_tab,
+            'secondary_tabs': list(self.secondary_tabs),
+            'commentary': dict(self.commentary),
+        }
+
+
+def eligibility_branch(education_stage, year_of_study, years_until_grad, is_final_year,
+                       has_placement, has_experience, has_grad_offer):
+    """Pick the catalog outcome for a student, as ``processEligibility`` does."""
+    if education_stage == EducationStage.GRADUATE:
+        return 'graduate_experience' if has_experience or has_placement else 'graduate'
+    if education_stage != EducationStage.UNIVERSITY:
+        return 'pre_university'
+
+    if years_until_grad > 2:
+        return 'early_placement' if has_placement else 'early'
+    # Year 2 + industrial placement takes priority regardless of years until graduation
+    if year_of_study == 2 and has_placement:
+        return 'year_two_placement'
+    if years_until_grad == 2:
+        return 'two_years_out_placement' if has_placement else 'two_years_out'
+    # Penultimate year, unless the degree finishes this year
+    if years_until_grad == 1 and not is_final_year:
+        return 'penultimate'
+    if is_final_year or years_until_grad == 0:
+        if has_grad_offer:
+            return 'final_year_grad_offer'
+        return 'final_year_experience' if has_experience or has_placement else 'final_year'
+    return 'early_placement' if has_placement else 'early'
+
+
+def _key_space():
+    """Yield every (stage, year of study, years until grad, flags...) in key order."""
+    flags = list(itertools.product((False, True), repeat=FLAG_COUNT))
+    for education_stage, year_of_study, years_until_grad, (is_final_year, *answers) in itertools.product(
+        EDUCATION_STAGES, YEAR_OF_STUDY_VALUES, YEARS_UNTIL_GRAD_VALUES, flags,
+    ):
+        if education_stage == EducationStage.UNIVERSITY:
+            reachable = year_of_study is not None and years_until_grad is not None
+        else:
+            reachable = year_of_study is None and years_until_grad is None and not is_final_year
+        yield (education_stage, year_of_study, years_until_grad, is_final_year, *answers) if reachable else None
+
+
+def _commentary_text(key, commentary, prefix):
+    # Sector-specific text wins over the shared text, as in getSectorCommentaryKey
+    if prefix and f'{prefix} {key}' in commentary:
+        return commentary[f'{prefix} {key}']
+    if key in commentary:
+        return commentary[key]
+    raise ValueError(f"Unknown commentary key: {key!r}")
+
+
+def _outcome_payloads(name, outcomes, commentary, prefix):
+    payloads = {}
+    for branch in BRANCHES:
+        if branch not in outcomes:
+            raise ValueError(f"{name} has no outcome for {branch}")
+        outcome = outcomes[branch]
+        payloads[branch] = json.dumps({
+            'primary_tab': outcome['primary_tab'],
+            'secondary_tabs': outcome['secondary_tabs'],
+            'commentary': {tab: _commentary_text(key, commentary, prefix) for tab, key in outcome['commentary'].items()},
+        }, separators=(',', ':')).encode()
+    return payloads
+
+
+def compile_catalog(source_path, target_path):
+    """Compile the JSON catalog at ``source_path`` into a binary index.
+
+    The index is written to a temporary file and renamed over ``target_path``,
+    so readers only ever see a complete file. Raises ``ValueError`` if a sector
+    is missing an outcome or refers to commentary that does not exist.
+    """
+    source = json.loads(Path(source_path).read_bytes())
+    commentary = source['commentary']
+    sectors = list(source['sectors'])
+    outcome_payloads = [
+        _outcome_payloads(name, sector['outcomes'], commentary, sector.get('commentary_prefix'))
+        for name, sector in source['sectors'].items()
+    ]
+    # Answers from sectors the catalog doesn't know
+    outcome_payloads.append(_outcome_payloads('default_outcomes', source['default_outcomes'], commentary, None))
+
+    result_ids = {}
+    entries = array('H')
+    for payloads in outcome_payloads:
+        for key in _key_space():
+            if key is None:
+                entries.append(UNREACHABLE)
+                continue
+            payload = payloads[eligibility_branch(*key[:7])]
+            entries.append(result_ids.setdefault(payload, len(result_ids)))
+    if len(result_ids) >= UNREACHABLE:
+        raise ValueError("Catalog has too many distinct results")
+
+    if sys.byteorder != 'little':
+        entries.byteswap()
+    career_paths = json.dumps(source.get('career_paths', {}), separators=(',', ':')).encode()
+    body = entries.tobytes() + career_paths + b''.join(result_ids)
+    meta = json.dumps({
+        'version': hashlib.blake2b(body, digest_size=8).hexdigest(),
+        'sectors': sectors,
+    }).encode()
+
+    offset = _HEADER.size + len(meta) + len(entries) * 2 + len(result_ids) * _DIRECTORY_ENTRY.size + len(career_paths)
+    directory = []
+    for payload in result_ids:
+        etag = hashlib.blake2b(payload, digest_size=8).hexdigest().encode()
+        directory.append(_DIRECTORY_ENTRY.pack(offset, len(payload), etag))
+        offset += len(payload)
+
+    target_path = Path(target_path)
+    with tempfile.NamedTemporaryFile(dir=target_path.parent, prefix=target_path.name, delete=False) as file:
+        try:
+            file.write(_HEADER.pack(MAGIC, len(meta), len(entries), len(result_ids), len(career_paths)))
+            file.write(meta)
+            file.write(entries.tobytes())
+            file.write(b''.join(directory))
+            file.write(career_paths)
+            file.write(b''.join(result_ids))
+            file.flush()
+            os.fsync(file.fileno())
+        except BaseException:
+            os.unlink(file.name)
+            raise
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, target_path)
+
+
+class Catalog:
+    """A compiled catalog, read into memory.
+
+    Raises ``ValueError`` if the file is not a complete compiled catalog.
+    """
+
+    def __init__(self, path):
+        # A private copy rather than a mapping, which would fault once the
+        # file was overwritten in place
+        with open(path, 'rb') as file:
+            self._buffer = buffer = file.read()
+
+        if len(buffer) < _HEADER.size:
+            raise ValueError(f"{path} is not a compiled catalog")
+        magic, meta_length, entry_count, result_count, career_paths_length = _HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled catalog")
+
+        offset = _HEADER.size
+        directory_end = offset + meta_length + entry_count * 2 + result_count * _DIRECTORY_ENTRY.size
+        if directory_end + career_paths_length > len(buffer):
+            raise ValueError(f"{path} is truncated")
+        meta = json.loads(buffer[offset:offset + meta_length])
+        if not (isinstance(meta, dict) and isinstance(meta.get('version'), str)
+                and isinstance(meta.get('sectors'), list)):
+            raise ValueError(f"{path} has no catalog version and sectors")
+        self.version = meta['version']
+        self.sectors = tuple(meta['sectors'])
+        offset += meta_length
+
+        if entry_count != (len(self.sectors) + 1) * _SECTOR_STRIDE:
+            raise ValueError(f"{path} has {entry_count} keys for {len(self.sectors)} sectors")
+        if sys.byteorder == 'little':
+            self._entries = memoryview(buffer)[offset:offset + entry_count * 2].cast('H')
+        else:
+            self._entries = array('H', buffer[offset:offset + entry_count * 2])
+            self._entries.byteswap()
+        offset += entry_count * 2
+
+        self._payloads = []
+        self.etags = []
+        for _ in range(result_count):
+            payload_offset, length, etag = _DIRECTORY_ENTRY.unpack_from(buffer, offset)
+            if payload_offset + length > len(buffer):
+                raise ValueError(f"{path} is truncated")
+            self._payloads.append((payload_offset, payload_offset + length))
+            self.etags.append(etag.decode())
+            offset += _DIRECTORY_ENTRY.size
+
+        self._career_paths = (offset, offset + career_paths_length)
+        end = self._payloads[-1][1] if self._payloads else offset + career_paths_length
+        if end != len(buffer):
+            raise ValueError(f"{path} is truncated")
+
+        self._sector_offsets = {sector: index * _SECTOR_STRIDE for index, sector in enumerate(self.sectors)}
+        self._default_offset = len(self.sectors) * _SECTOR_STRIDE
+        self._results = [None] * result_count
+
+    @property
+    def result_count(self):
+        return len(self._payloads)
+
+    def result_id(self, key):
+        """Return the result ID for an eligibility key from ``SurveyProcessor.eligibility_key``."""
+        (sector, education_stage, year_of_study, years_until_grad,
+         is_final_year, has_placement, has_experience, has_grad_offer, has_spring_weeks) = key
+        index = (
+            self._sector_offsets.get(sector, self._default_offset)
+            + _STAGE_OFFSETS[education_stage]
+            + _YEAR_OF_STUDY_OFFSETS[year_of_study]
+            + _YEARS_UNTIL_GRAD_OFFSETS[years_until_grad]
+            + (is_final_year << 4 | has_placement << 3 | has_experience << 2 | has_grad_offer << 1 | has_spring_weeks)
+        )
+        result_id = self._entries[index]
+        if result_id == UNREACHABLE:
+            raise ValueError(f"No result for eligibility key {key}")
+        return result_id
+
+    def payload(self, result_id):
+        """Return the JSON encoding of a result."""
+        start, end = self._payloads[result_id]
+        return self._buffer[start:end]
+
+    def result(self, result_id):
+        result = self._results[result_id]
+        if result is None:
+            data = json.loads(self.payload(result_id))
+            result = self._results[result_id] = EligibilityResult(
+                data['primary_tab'], tuple(data['secondary_tabs']), tuple(data['commentary'].items()),
+            )
+        return result
+
+    def career_paths(self):
+        """Return the career path descriptions as JSON, keyed by tab."""
+        start, end = self._career_paths
+        return self._buffer[start:end]
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class CatalogLoader:
+    """Keeps the newest compiled catalog open.
+
+    The file is checked at most every ``check_interval`` seconds, by the first
+    request after the interval. A replacement is opened and validated in full
+    before it becomes current, and one that fails validation is ignored until
+    the file changes again. Requests should take one catalog from ``current()``
+    and use it throughout, so they never mix results from two versions.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._signature = _file_signature(self.path)
+        self._catalog = Catalog(self.path)
+        self._next_check = time.monotonic() + check_interval
+
+    @classmethod
+    def from_source(cls, source_path=DEFAULT_SOURCE, **kwargs):
+        """Open the index compiled from ``source_path``, compiling it first if it is missing or stale."""
+        source_path = Path(source_path)
+        target_path = source_path.with_suffix('.bin')
+        if not target_path.exists() or target_path.stat().st_mtime_ns < source_path.stat().st_mtime_ns:
+            compile_catalog(source_path, target_path)
+        return cls(target_path, **kwargs)
+
+    def current(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self._reload_if_changed()
+        return self._catalog
+
+    def _reload_if_changed(self):
+        try:
+            signature = _file_signature(self.path)
+        except OSError as error:
+            logger.warning("Keeping catalog %s: %s", self._catalog.version, error)
+            return
+        if signature == self._signature:
+            return
+
+        self._signature = signature
+        try:
+            catalog = Catalog(self.path)
+        except (OSError, ValueError) as error:
+            logger.warning("Keeping catalog %s: %s", self._catalog.version, error)
+            return
+        # A single assignment, so other threads see either catalog but never a mix
+        self._catalog = catalog
+        logger.info("Loaded catalog %s from %s", catalog.version, self.path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the recommendation catalog into a binary index.")
+    parser.add_argument('source', nargs='?', type=Path, default=DEFAULT_SOURCE,
+                        help="JSON catalog (default: rules/catalog.json)")
+    parser.add_argument('-o', '--output', type=Path, help="compiled index (default: the source path with .bin)")
+    args = parser.parse_args(argv)
+
+    compile_catalog(args.source, args.output or args.source.with_suffix('.bin'))
+
+
+if __name__ == '__main__':
+    main()
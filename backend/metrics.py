@@ -0,0 +1,265 @@
+"""Counters, latency histograms and an on-demand sampling profiler.
+
+Metrics are kept in memory and rendered in the Prometheus text exposition
+format. Worker processes that share a directory (see ``SurveyMetrics.share``)
+each write their metrics there, and any of them renders the sum, so scrapes
+see the same totals whichever worker answers. With metrics disabled, the
+hooks on the request path are no-op method calls.
+"""
+import bisect
+import collections
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from catalog import eligibility_branch
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; a recommendation normally takes microseconds
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 1e-2, 0.1)
+SAMPLE_INTERVAL = 0.001
+# How often a worker writes its metrics to the shared directory
+FLUSH_INTERVAL = 1.0
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + 1
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(label_values), value] for label_values, value in self._values.items()]
+
+    @staticmethod
+    def merge(snapshots):
+        totals = {}
+        for snapshot in snapshots:
+            for label_values, value in snapshot:
+                label_values = tuple(label_values)
+                totals[label_values] = totals.get(label_values, 0) + value
+        return totals
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted((self._values if values is None else values).items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: a count for each bucket and one for +Inf, then the sum
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return sum(series[:-1]) if series else 0
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(label_values), list(series)] for label_values, series in self._series.items()]
+
+    @staticmethod
+    def merge(snapshots):
+        totals = {}
+        for snapshot in snapshots:
+            for label_values, series in snapshot:
+                label_values = tuple(label_values)
+                total = totals.get(label_values)
+                totals[label_values] = series if total is None else [a + b for a, b in zip(total, series)]
+        return totals
+
+    def render(self, series_by_labels=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        series_by_labels = self._series if series_by_labels is None else series_by_labels
+        for label_values, series in sorted(series_by_labels.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, [('le', bound)])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {series[-1]}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Stopwatch:
+    """Records the time since the previous lap under each stage name."""
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self._histogram.observe(now - self._last, stage)
+        self._last = now
+
+
+class _DisabledStopwatch:
+
+    def lap(self, stage):
+        pass
+
+
+_DISABLED_STOPWATCH = _DisabledStopwatch()
+
+
+class SurveyMetrics:
+    """The metrics recorded for ``/api/survey``."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.directory = None
+        self._path = None
+        self.stage_seconds = Histogram(
+            'survey_stage_duration_seconds',
+            "Time spent in each stage of a recommendation request.",
+            ('stage',),
+        )
+        self.recommendations = Counter(
+            'survey_recommendations_total',
+            "Recommendations returned, by sector, eligibility branch and primary tab.",
+            ('sector', 'branch', 'primary_tab'),
+        )
+
+    def stopwatch(self):
+        return Stopwatch(self.stage_seconds) if self.enabled else _DISABLED_STOPWATCH
+
+    def record_recommendation(self, catalog, key, result_id):
+        if not self.enabled:
+            return
+        # Free-text sectors would give every typo its own series
+        sector = key[0] if key[0] in catalog.sectors else 'other'
+        self.recommendations.inc(sector, eligibility_branch(*key[1:8]), catalog.result(result_id).primary_tab)
+
+    def share(self, directory, interval=FLUSH_INTERVAL):
+        """Write this process's metrics to ``directory`` every ``interval`` seconds.
+
+        ``render`` then reports the sum over every file in ``directory``,
+        including those of processes that have exited, so counters never go
+        backwards when a worker is replaced. Call this in each worker after
+        forking.
+        """
+        self.directory = Path(directory)
+        # Unique even if a later worker reuses this pid
+        self._path = self.directory / f'{os.getpid()}-{time.time_ns()}.json'
+        threading.Thread(target=self._flush_periodically, args=(interval,), daemon=True).start()
+
+    def flush(self):
+        if self._path is None:
+            return
+        snapshot = {'stage_seconds': self.stage_seconds.snapshot(), 'recommendations': self.recommendations.snapshot()}
+        temporary = self._path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(snapshot))
+        os.replace(temporary, self._path)
+
+    def _flush_periodically(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except OSError as error:
+                logger.warning("Could not write metrics to %s: %s", self._path, error)
+
+    def render(self):
+        if self.directory is None:
+            return '\n'.join(self.stage_seconds.render() + self.recommendations.render()) + '\n'
+
+        self.flush()
+        snapshots = []
+        for path in self.directory.glob('*.json'):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                # Removed while being read
+                continue
+        stage_seconds = Histogram.merge(snapshot['stage_seconds'] for snapshot in snapshots)
+        recommendations = Counter.merge(snapshot['recommendations'] for snapshot in snapshots)
+        return '\n'.join(self.stage_seconds.render(stage_seconds) + self.recommendations.render(recommendations)) + '\n'
+
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        stack.append(f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+class SamplingProfiler:
+    """Samples one thread's stack from a background thread.
+
+    ``stop`` writes the samples to ``directory`` in the collapsed-stack format
+    read by flamegraph.pl and speedscope, one ``stack count`` line per stack.
+    """
+
+    def __init__(self, directory, thread_id=None, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.path = Path(directory) / f'{time.time_ns()}-{os.getpid()}-{self.thread_id}.folded'
+        self.samples = collections.Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common()))
+        return self.path
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[_collapse(frame)] += 1
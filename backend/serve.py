@@ -0,0 +1,220 @@
+"""Multi-process server for running the API in production (POSIX only).
+
+The app, its recommendation catalog and the flow graph are built once in the
+master process, which then forks worker processes that share them
+copy-on-write. Workers write their metrics to a shared temporary directory,
+so /metrics reports the same totals whichever worker answers. Each worker
+caps its in-flight requests and answers anything beyond that with an
+immediate 503. Crashed workers are restarted after a delay that doubles with
+each recent crash, and the server exits if they keep crashing. SIGTERM or
+SIGINT stops the workers from accepting connections and lets in-flight
+requests finish before exiting.
+
+Usage: python serve.py --workers 4 --port 5000
+"""
+import argparse
+import collections
+import gc
+import json
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+from werkzeug.wsgi import ClosingIterator
+
+import app as survey_app
+
+OVERLOADED_BODY = json.dumps({'error': "Server is overloaded, please retry"}).encode()
+
+
+class ConcurrencyLimiter:
+    """WSGI middleware that rejects requests once ``max_concurrent`` are in flight."""
+
+    def __init__(self, app, max_concurrent):
+        self.app = app
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def __call__(self, environ, start_response):
+        if not self._slots.acquire(blocking=False):
+            start_response('503 Service Unavailable', [
+                ('Content-Type', 'application/json'),
+                ('Content-Length', str(len(OVERLOADED_BODY))),
+                ('Retry-After', '1'),
+            ])
+            return [OVERLOADED_BODY]
+
+        try:
+            # Hold the slot until a streamed response has been fully sent
+            return ClosingIterator(self.app(environ, start_response), self._slots.release)
+        except BaseException:
+            self._slots.release()
+            raise
+
+
+class RestartBackoff:
+    """Spaces out restarts of crashed workers.
+
+    ``crashed`` returns how long to wait before restarting a worker, doubling
+    with each crash in the last ``window`` seconds, or None once there have
+    been ``max_crashes`` in that window.
+    """
+
+    def __init__(self, initial=0.1, maximum=10, max_crashes=10, window=60):
+        self.initial = initial
+        self.maximum = maximum
+        self.max_crashes = max_crashes
+        self.window = window
+        self._crashes = collections.deque()
+
+    def crashed(self, now):
+        self._crashes.append(now)
+        while self._crashes[0] <= now - self.window:
+            self._crashes.popleft()
+        if len(self._crashes) >= self.max_crashes:
+            return None
+        return min(self.initial * 2 ** (len(self._crashes) - 1), self.maximum)
+
+
+class _RequestHandler(WSGIRequestHandler):
+    # Idle keep-alive connections are dropped so shutdown never waits on them
+    timeout = 5
+
+    def log_request(self, code='-', size='-'):
+        pass
+
+
+def _run_worker(listener, max_concurrent, metrics_dir):
+    survey_app.metrics.share(metrics_dir)
+    server = make_server(
+        *listener.getsockname()[:2], ConcurrencyLimiter(survey_app.app, max_concurrent),
+        threaded=True, request_handler=_RequestHandler, fd=listener.fileno(),
+    )
+    # Let server_close() wait for request threads instead of abandoning them
+    server.daemon_threads = False
+    server.block_on_close = True
+
+    def stop(signum, frame):
+        # shutdown() blocks until serve_forever() returns, so it can't run here
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    server.serve_forever()
+    server.server_close()
+    survey_app.metrics.flush()
+
+
+def _spawn_worker(listener, max_concurrent, metrics_dir):
+    pid = os.fork()
+    if pid == 0:
+        # Drop the master's handlers until _run_worker installs the worker's own
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            _run_worker(listener, max_concurrent, metrics_dir)
+        except BaseException:
+            traceback.print_exc()
+            os._exit(1)
+        os._exit(0)
+    return pid
+
+
+def _signal_all(pids, signum):
+    for pid in pids:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            # Reaped but not yet removed from the set
+            pass
+
+
+def serve(host, port, workers, max_concurrent, backlog, graceful_timeout):
+    listener = socket.create_server((host, port), backlog=backlog)
+    host, port = listener.getsockname()[:2]
+
+    # Build everything workers share before forking, then keep the garbage
+    # collector from touching (and so copying) those pages in the workers
+    survey_app._flow_graph()
+    gc.freeze()
+    # Workers write their metrics here so /metrics can report the totals
+    metrics_dir = tempfile.mkdtemp(prefix='survey-metrics-')
+
+    children = {_spawn_worker(listener, max_concurrent, metrics_dir) for _ in range(workers)}
+    print(f"Serving on http://{host}:{port} with {workers} workers", flush=True)
+
+    stopping = False
+    failed = False
+    backoff = RestartBackoff()
+    # When each pending restart is due
+    restarts = []
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        _signal_all(children, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    deadline = None
+    while children or (restarts and not stopping):
+        if stopping and deadline is None:
+            deadline = time.monotonic() + graceful_timeout
+        if deadline is not None and time.monotonic() > deadline:
+            _signal_all(children, signal.SIGKILL)
+            deadline = float('inf')
+
+        while restarts and not stopping and restarts[0] <= time.monotonic():
+            restarts.pop(0)
+            children.add(_spawn_worker(listener, max_concurrent, metrics_dir))
+
+        pid, status = os.waitpid(-1, os.WNOHANG) if children else (0, 0)
+        if pid == 0:
+            time.sleep(0.1)
+            continue
+        children.discard(pid)
+        if stopping:
+            continue
+        delay = backoff.crashed(time.monotonic())
+        if delay is None:
+            print(f"Worker {pid} exited with status {status}; {backoff.max_crashes} workers have exited in "
+                  f"{backoff.window} seconds, so stopping", file=sys.stderr, flush=True)
+            failed = True
+            stop(None, None)
+        else:
+            print(f"Worker {pid} exited with status {status}; restarting it in {delay:g}s",
+                  file=sys.stderr, flush=True)
+            restarts.append(time.monotonic() + delay)
+            restarts.sort()
+
+    listener.close()
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the survey API with pre-forked worker processes.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--max-concurrent', type=int, default=16,
+                        help="requests each worker handles at once before answering 503 (default: 16)")
+    parser.add_argument('--backlog', type=int, default=128,
+                        help="connections queued by the kernel before being refused (default: 128)")
+    parser.add_argument('--graceful-timeout', type=float, default=30,
+                        help="seconds to let in-flight requests finish on shutdown (default: 30)")
+    args = parser.parse_args(argv)
+
+    sys.exit(serve(args.host, args.port, args.workers, args.max_concurrent, args.backlog, args.graceful_timeout))
+
+
+if __name__ == '__main__':
+    main()
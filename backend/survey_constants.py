@@ -0,0 +1,33 @@
+"""Constants shared by the survey processor and the Flask API.
+
+These mirror ``frontend/src/app/models/survey-constants.ts`` so that the
+backend and the local Angular processor produce identical recommendations.
+"""
+
+
+class EducationStage:
+    HIGH_SCHOOL = 'high school'
+    UNIVERSITY = 'university'
+    GRADUATE = 'graduate'
+
+    ALL = (HIGH_SCHOOL, UNIVERSITY, GRADUATE)
+
+
+class Sector:
+    TECH = 'Technology'
+    LAW = 'Law'
+    FINANCE = 'Finance'
+
+    ALL = (FINANCE, TECH, LAW)
+
+
+class StepType:
+    WELCOME = 0
+    SECTOR = 1
+    EDUCATION_STAGE = 2
+    UNIVERSITY_TIMELINE = 3
+    SPRING_WEEKS = 4
+    SPRING_CONVERSION = 5
+    INTERNSHIP_EXPERIENCE = 'internship_experience'
+    GRAD_OFFER = 'grad_offer'
+    FINAL = 'final'
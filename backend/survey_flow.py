@@ -0,0 +1,177 @@
+"""The survey step state machine as a static graph.
+
+Nodes are ``StepType`` values and edges carry declarative predicates over the
+survey answers, evaluated in order with the first match winning. The graph is
+checked against ``SurveyProcessor.get_next_step`` when it is built, and each
+edge records the question the processor returns for it in every sector.
+
+Predicates map a field to the value it must equal, or to a ``{"lt"|"le"|"ge":
+bound}`` comparison; ``{"any": [...]}`` matches if any nested predicate does.
+``year_of_study`` and ``years_until_grad`` are derived from the university
+timeline as in ``SurveyProcessor``.
+"""
+import hashlib
+import itertools
+import json
+import operator
+
+from survey_constants import EducationStage, Sector, StepType
+
+# The survey field each question answers, for questions with a fixed set of answers
+ANSWER_FIELDS = {
+    StepType.SECTOR: 'sector',
+    StepType.EDUCATION_STAGE: 'education_stage',
+    StepType.SPRING_WEEKS: 'has_spring_weeks',
+    StepType.SPRING_CONVERSION: 'converted_spring_to_internship',
+    StepType.INTERNSHIP_EXPERIENCE: 'has_experience',
+    StepType.GRAD_OFFER: 'has_grad_offer',
+}
+
+_GRAD_OFFER_DUE = {'any': [{'years_until_grad': {'le': 1}}, {'year_of_study': {'ge': 4}}]}
+
+FORWARD_EDGES = (
+    (StepType.WELCOME, StepType.SECTOR, {}),
+    (StepType.SECTOR, StepType.EDUCATION_STAGE, {}),
+    (StepType.EDUCATION_STAGE, StepType.FINAL, {'education_stage': EducationStage.HIGH_SCHOOL}),
+    (StepType.EDUCATION_STAGE, StepType.INTERNSHIP_EXPERIENCE, {'education_stage': EducationStage.GRADUATE}),
+    (StepType.EDUCATION_STAGE, StepType.UNIVERSITY_TIMELINE, {}),
+    (StepType.UNIVERSITY_TIMELINE, StepType.FINAL,
+     {'any': [{'year_of_study': {'lt': 2}}, {'years_until_grad': {'le': 0}}]}),
+    (StepType.UNIVERSITY_TIMELINE, StepType.SPRING_WEEKS, {}),
+    (StepType.SPRING_WEEKS, StepType.SPRING_CONVERSION, {'has_spring_weeks': True}),
+    (StepType.SPRING_WEEKS, StepType.INTERNSHIP_EXPERIENCE, {'year_of_study': {'ge': 2}}),
+    (StepType.SPRING_WEEKS, StepType.FINAL, {}),
+    (StepType.SPRING_CONVERSION, StepType.GRAD_OFFER, {'converted_spring_to_internship': True, **_GRAD_OFFER_DUE}),
+    (StepType.SPRING_CONVERSION, StepType.FINAL, {'converted_spring_to_internship': True}),
+    (StepType.SPRING_CONVERSION, StepType.INTERNSHIP_EXPERIENCE, {}),
+    (StepType.INTERNSHIP_EXPERIENCE, StepType.GRAD_OFFER, {'education_stage': EducationStage.GRADUATE}),
+    (StepType.INTERNSHIP_EXPERIENCE, StepType.GRAD_OFFER, _GRAD_OFFER_DUE),
+    (StepType.INTERNSHIP_EXPERIENCE, StepType.FINAL, {}),
+    (StepType.GRAD_OFFER, StepType.FINAL, {}),
+)
+
+BACK_EDGES = (
+    (StepType.SECTOR, StepType.WELCOME, {}),
+    (StepType.EDUCATION_STAGE, StepType.SECTOR, {}),
+    (StepType.UNIVERSITY_TIMELINE, StepType.EDUCATION_STAGE, {}),
+    (StepType.SPRING_WEEKS, StepType.UNIVERSITY_TIMELINE, {}),
+    (StepType.SPRING_CONVERSION, StepType.SPRING_WEEKS, {}),
+    (StepType.INTERNSHIP_EXPERIENCE, StepType.SPRING_CONVERSION,
+     {'has_spring_weeks': True, 'converted_spring_to_internship': False}),
+    (StepType.INTERNSHIP_EXPERIENCE, StepType.SPRING_WEEKS, {}),
+    (StepType.GRAD_OFFER, StepType.SPRING_CONVERSION,
+     {'has_spring_weeks': True, 'converted_spring_to_internship': True}),
+    (StepType.GRAD_OFFER, StepType.INTERNSHIP_EXPERIENCE, {}),
+)
+
+_COMPARISONS = {'lt': operator.lt, 'le': operator.le, 'ge': operator.ge}
+
+
+def matches(predicate, values):
+    for field, expected in predicate.items():
+        if field == 'any':
+            if not any(matches(option, values) for option in expected):
+                return False
+        elif isinstance(expected, dict):
+            actual = values.get(field)
+            if actual is None or not all(_COMPARISONS[op](actual, bound) for op, bound in expected.items()):
+                return False
+        elif values.get(field) != expected:
+            return False
+    return True
+
+
+def find_edge(edges, step, values):
+    """Return the index of the first edge out of ``step`` whose predicate matches."""
+    for index, (source, _, predicate) in enumerate(edges):
+        if source == step and matches(predicate, values):
+            return index
+    return None
+
+
+def answer_options(response):
+    """List the (field, value) answers to the question in a step response."""
+    field = ANSWER_FIELDS.get(response['next_step'])
+    if field is None or 'question' not in response:
+        return []
+    if response.get('type') == 'boolean':
+        return [(field, True), (field, False)]
+    return [(field, option) for option in response.get('options', [])]
+
+
+def _form_timelines(today):
+    # Mirrors SurveyFormComponent.generateYearArrays
+    start_years = range(today.year - 6, today.year + 1)
+    graduation_years = range(today.year, today.year + 8)
+    return itertools.product(start_years, graduation_years, (False, True))
+
+
+def survey_states(today):
+    """Yield survey answers for every sector, stage and form timeline on ``today``."""
+    flags = list(itertools.product((False, True), repeat=4))
+    for sector, (has_spring_weeks, converted, has_experience, has_grad_offer) in itertools.product(Sector.ALL, flags):
+        answers = {
+            'sector': sector,
+            'has_spring_weeks': has_spring_weeks,
+            'converted_spring_to_internship': converted,
+            'has_experience': has_experience,
+            'has_grad_offer': has_grad_offer,
+        }
+        yield {**answers, 'education_stage': EducationStage.HIGH_SCHOOL}
+        yield {**answers, 'education_stage': EducationStage.GRADUATE}
+        for start_year, graduation_year, has_placement in _form_timelines(today):
+            yield {
+                **answers,
+                'education_stage': EducationStage.UNIVERSITY,
+                'start_year': start_year,
+                'graduation_year': graduation_year,
+                'has_placement': has_placement,
+            }
+
+
+def build_flow_graph(processor):
+    """Build the flow graph, checking every edge against ``processor``.
+
+    Raises ``ValueError`` if the processor makes a transition that the first
+    matching edge does not describe, or shows different questions for the
+    same edge and sector.
+    """
+    today = processor.calendar.clock()
+    academic_year = processor.calendar.current()
+    directions = {'forward': FORWARD_EDGES, 'back': BACK_EDGES}
+    questions = {direction: [{} for _ in edges] for direction, edges in directions.items()}
+    steps = {source for source, _, _ in FORWARD_EDGES + BACK_EDGES}
+
+    for survey_data in survey_states(today):
+        values = dict(survey_data)
+        if survey_data['education_stage'] == EducationStage.UNIVERSITY:
+            values['year_of_study'] = processor.calculate_year_of_study(survey_data, academic_year)
+            values['years_until_grad'] = processor.calculate_years_until_graduation(survey_data, academic_year)
+
+        for (direction, edges), step in itertools.product(directions.items(), steps):
+            response = processor.get_next_step({**survey_data, 'current_step': step, 'is_previous': direction == 'back'})
+            index = find_edge(edges, step, values)
+            if index is None or 'error' in response:
+                continue
+
+            if response['next_step'] != edges[index][1]:
+                raise ValueError(f"No {direction} edge from {step!r} to {response['next_step']!r} for {survey_data}")
+            question = {field: value for field, value in response.items() if field != 'next_step'}
+            if questions[direction][index].setdefault(survey_data['sector'], question) != question:
+                raise ValueError(f"Conflicting questions on {direction} edge from {step!r} for {survey_data}")
+
+    graph = {
+        'nodes': [StepType.WELCOME, StepType.SECTOR, StepType.EDUCATION_STAGE, StepType.UNIVERSITY_TIMELINE,
+                  StepType.SPRING_WEEKS, StepType.SPRING_CONVERSION, StepType.INTERNSHIP_EXPERIENCE,
+                  StepType.GRAD_OFFER, StepType.FINAL],
+        'answer_fields': {str(step): field for step, field in ANSWER_FIELDS.items()},
+        'edges': {
+            direction: [
+                {'from': source, 'to': target, 'when': predicate, 'question': questions[direction][index]}
+                for index, (source, target, predicate) in enumerate(edges)
+            ]
+            for direction, edges in directions.items()
+        },
+    }
+    graph['version'] = hashlib.blake2b(json.dumps(graph, sort_keys=True).encode(), digest_size=8).hexdigest()
+    return graph
@@ -0,0 +1,336 @@
+"""Survey step and eligibility logic for the Flask API.
+
+This is a port of ``SurveyProcessorService`` from the Angular frontend. The
+step handlers are ported as-is; eligibility recommendations are looked up in
+the compiled catalog (see ``catalog.py``), so ``process_eligibility`` costs a
+single index lookup.
+"""
+import math
+import re
+
+from academic_calendar import AcademicCalendar
+from catalog import CatalogLoader
+from survey_constants import EducationStage, Sector, StepType
+
+FINAL_MESSAGE = "Thank you for completing the survey!"
+
+_LEADING_INT = re.compile(r'\s*([+-]?\d+)')
+
+
+def parse_year(value):
+    """Read a year the way ``parseInt`` does in the frontend, or None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if math.isfinite(value) else None
+    # Fast path for the plain digit strings that CSV and query strings carry
+    if isinstance(value, str) and value.isdecimal():
+        return int(value)
+    match = _LEADING_INT.match(str(value))
+    return int(match.group(1)) if match else None
+
+
+def _sector_question():
+    return {
+        'next_step': StepType.SECTOR,
+        'question': "Which sector are you interested in?",
+        'type': "select_sector",
+        'options': [Sector.FINANCE, Sector.TECH, Sector.LAW],
+    }
+
+
+def _education_stage_question():
+    return {
+        'next_step': StepType.EDUCATION_STAGE,
+        'question': "What is your current education stage?",
+        'type': "select",
+        'options': [EducationStage.HIGH_SCHOOL, EducationStage.UNIVERSITY, EducationStage.GRADUATE],
+    }
+
+
+def _university_timeline_question():
+    return {
+        'next_step': StepType.UNIVERSITY_TIMELINE,
+        'question': "Please select your university start year and expected graduation year:",
+        'type': "year_selection",
+        'has_placement': True,
+    }
+
+
+def _grad_offer_question():
+    return {
+        'next_step': StepType.GRAD_OFFER,
+        'question': "Do you have a graduate offer?",
+        'type': "boolean",
+    }
+
+
+def _final_step(message=FINAL_MESSAGE):
+    return {'next_step': StepType.FINAL, 'message': message}
+
+
+class SurveyProcessor:
+
+    def __init__(self, calendar=None, catalogs=None):
+        self.calendar = calendar or AcademicCalendar()
+        # Compiles rules/catalog.json on first use, then follows the compiled file
+        self.catalogs = catalogs or CatalogLoader.from_source()
+
+    # Survey steps
+
+    def get_next_step(self, survey_data, academic_year=None):
+        current_step = survey_data.get('current_step')
+        academic_year = academic_year or self.calendar.current()
+
+        try:
+            if survey_data.get('is_previous'):
+                return self._get_previous_step(current_step, survey_data)
+
+            if current_step == StepType.WELCOME:
+                return _sector_question()
+            if current_step == StepType.SECTOR:
+                return self._handle_sector(survey_data)
+            if current_step == StepType.EDUCATION_STAGE:
+                return self._handle_education_stage_step(survey_data)
+            if current_step == StepType.UNIVERSITY_TIMELINE:
+                return self._handle_university_timeline_step(survey_data, academic_year)
+            if current_step == StepType.SPRING_WEEKS:
+                return self._handle_spring_weeks(survey_data, academic_year)
+            if current_step == StepType.SPRING_CONVERSION:
+                return self._handle_spring_conversion_step(survey_data, academic_year)
+            if current_step == StepType.INTERNSHIP_EXPERIENCE:
+                return self._handle_internship_experience(survey_data, academic_year)
+            if current_step == StepType.GRAD_OFFER:
+                return self._handle_grad_offer(survey_data)
+            return _final_step()
+        except ValueError as error:
+            return {
+                'next_step': current_step,
+                'error': f"Error processing step: {error}",
+            }
+
+    def _handle_sector(self, survey_data):
+        if not survey_data.get('sector'):
+            return {
+                'next_step': StepType.SECTOR,
+                'error': "Please select a sector",
+            }
+
+        # After sector selection, move to education stage
+        return _education_stage_question()
+
+    def _handle_education_stage_step(self, survey_data):
+        education_stage = survey_data.get('education_stage')
+
+        if education_stage == EducationStage.HIGH_SCHOOL:
+            return _final_step("High school students should check the Pre-University tab for available opportunities.")
+
+        if education_stage == EducationStage.GRADUATE:
+            # Graduates are equivalent to final year+ students, so they are asked
+            # about internship experience and then graduate offers
+            return {
+                'next_step': StepType.INTERNSHIP_EXPERIENCE,
+                'question': "Do you have any internship experience?",
+                'type': "boolean",
+            }
+
+        # University students
+        return _university_timeline_question()
+
+    def _handle_university_timeline_step(self, survey_data, academic_year):
+        year_of_study = self.calculate_year_of_study(survey_data, academic_year)
+        years_until_grad = self.calculate_years_until_graduation(survey_data, academic_year)
+
+        # Year 1 students and those already graduating finish the survey early
+        if year_of_study < 2 or (years_until_grad is not None and years_until_grad <= 0):
+            return _final_step()
+
+        return {
+            'next_step': StepType.SPRING_WEEKS,
+            'question': self._get_spring_weeks_question_text(survey_data.get('sector')),
+            'type': "boolean",
+        }
+
+    def _handle_spring_weeks(self, survey_data, academic_year):
+        year_of_study = self.calculate_year_of_study(survey_data, academic_year)
+
+        if not survey_data.get('has_spring_weeks'):
+            # Only ask about internship experience if they're year 2 or later
+            if year_of_study >= 2:
+                return {
+                    'next_step': StepType.INTERNSHIP_EXPERIENCE,
+                    'question': "Do you have any internship experience?",
+                    'type': "boolean",
+                }
+            return _final_step()
+
+        return {
+            'next_step': StepType.SPRING_CONVERSION,
+            'question': self._get_conversion_question_text(survey_data.get('sector')),
+            'type': "boolean",
+        }
+
+    def _handle_spring_conversion_step(self, survey_data, academic_year):
+        years_until_grad = self.calculate_years_until_graduation(survey_data, academic_year)
+        year_of_study = self.calculate_year_of_study(survey_data, academic_year)
+
+        if survey_data.get('converted_spring_to_internship'):
+            survey_data['has_experience'] = True
+
+            # Only ask about a grad offer in the final or penultimate year, or year 4+
+            if (years_until_grad is not None and years_until_grad <= 1) or year_of_study >= 4:
+                return _grad_offer_question()
+            return _final_step()
+
+        # They had spring weeks but didn't convert, so ask about other experience
+        return {
+            'next_step': StepType.INTERNSHIP_EXPERIENCE,
+            'question': " Have you completed any prior relevant Summer Internships or Full-Time work?",
+            'type': "boolean",
+        }
+
+    def _handle_internship_experience(self, survey_data, academic_year):
+        if survey_data.get('has_experience'):
+            survey_data['has_experience'] = True
+
+        # Graduates should always be asked about graduate offers
+        if survey_data.get('education_stage') == EducationStage.GRADUATE:
+            return _grad_offer_question()
+
+        year_of_study = self.calculate_year_of_study(survey_data, academic_year)
+        years_until_grad = self.calculate_years_until_graduation(survey_data, academic_year)
+
+        # Ask about a grad offer in the final or penultimate year, or year 4+
+        if (years_until_grad is not None and years_until_grad <= 1) or year_of_study >= 4:
+            return _grad_offer_question()
+        return _final_step()
+
+    def _handle_grad_offer(self, survey_data):
+        if survey_data.get('has_grad_offer'):
+            survey_data['has_grad_offer'] = True
+
+        return _final_step()
+
+    def _get_previous_step(self, current_step, survey_data):
+        sector = survey_data.get('sector')
+
+        if current_step == StepType.SECTOR:
+            return {
+                'next_step': StepType.WELCOME,
+                'message': "Welcome to the Programme Eligibility Survey",
+            }
+        if current_step == StepType.EDUCATION_STAGE:
+            return _sector_question()
+        if current_step == StepType.UNIVERSITY_TIMELINE:
+            return _education_stage_question()
+        if current_step == StepType.SPRING_WEEKS:
+            return _university_timeline_question()
+        if current_step == StepType.SPRING_CONVERSION:
+            return {
+                'next_step': StepType.SPRING_WEEKS,
+                'question': self._get_spring_weeks_question_text(sector),
+                'type': "boolean",
+            }
+
+        if current_step == StepType.INTERNSHIP_EXPERIENCE:
+            # They came from spring conversion if they had spring weeks but didn't convert
+            if survey_data.get('has_spring_weeks') is True and survey_data.get('converted_spring_to_internship') is False:
+                return {
+                    'next_step': StepType.SPRING_CONVERSION,
+                    'question': self._get_conversion_question_text(sector),
+                    'type': "boolean",
+                }
+            return {
+                'next_step': StepType.SPRING_WEEKS,
+                'question': self._get_spring_weeks_question_text(sector),
+                'type': "boolean",
+            }
+
+        if current_step == StepType.GRAD_OFFER:
+            # Converting a spring week skips the internship question
+            if survey_data.get('has_spring_weeks') is True and survey_data.get('converted_spring_to_internship') is True:
+                return {
+                    'next_step': StepType.SPRING_CONVERSION,
+                    'question': self._get_conversion_question_text(sector),
+                    'type': "boolean",
+                }
+            return {
+                'next_step': StepType.INTERNSHIP_EXPERIENCE,
+                'question': "Have you completed any prior relevant Summer Internships or Full-Time work?",
+                'type': "boolean",
+            }
+
+        return _sector_question()
+
+    def _get_spring_weeks_question_text(self, sector=None):
+        if sector in (Sector.TECH, Sector.LAW):
+            return "Have you attended any Insight Programmes?"
+        return "Have you attended any Spring Weeks?"
+
+    def _get_conversion_question_text(self, sector=None):
+        if sector == Sector.TECH:
+            return "Did you convert your Insight Programme to a Summer Internship?"
+        return "Did you convert your Spring Week to a Summer Internship?"
+
+    # Academic year calculations
+
+    def calculate_years_until_graduation(self, survey_data, academic_year=None):
+        graduation_year = parse_year(survey_data.get('graduation_year'))
+        if not graduation_year:
+            return None
+
+        return (academic_year or self.calendar.current()).years_until_graduation(graduation_year)
+
+    def calculate_year_of_study(self, survey_data, academic_year=None):
+        start_year, graduation_year = self._timeline_years(survey_data)
+        academic_year = academic_year or self.calendar.current()
+        return academic_year.timeline(start_year, graduation_year, survey_data.get('has_placement'))[0]
+
+    def _timeline_years(self, survey_data):
+        start_year = parse_year(survey_data.get('start_year'))
+        graduation_year = parse_year(survey_data.get('graduation_year'))
+
+        if not start_year or not graduation_year:
+            raise ValueError("Start year and graduation year are required")
+        return start_year, graduation_year
+
+    # Eligibility
+
+    def process_eligibility(self, survey_data, academic_year=None):
+        """Look up the recommendation for ``survey_data`` in the current catalog."""
+        catalog = self.catalogs.current()
+        return catalog.result(catalog.result_id(self.eligibility_key(survey_data, academic_year)))
+
+    def eligibility_key(self, survey_data, academic_year=None):
+        """Reduce ``survey_data`` to the key its recommendation is compiled under."""
+        sector = survey_data.get('sector')
+        education_stage = survey_data.get('education_stage')
+        year_of_study = years_until_grad = None
+        is_final_year = False
+
+        if education_stage == EducationStage.UNIVERSITY:
+            start_year, graduation_year = self._timeline_years(survey_data)
+            academic_year = academic_year or self.calendar.current()
+            year_of_study, years_until_grad = academic_year.timeline(
+                start_year, graduation_year, survey_data.get('has_placement'),
+            )
+            is_final_year = year_of_study >= graduation_year - start_year
+            year_of_study = min(max(year_of_study, 1), 3)
+            years_until_grad = min(max(years_until_grad, -1), 3)
+        elif education_stage not in EducationStage.ALL:
+            education_stage = None
+
+        return (
+            # Sectors missing from the catalog get its default outcomes
+            sector if isinstance(sector, str) else None,
+            education_stage,
+            year_of_study,
+            years_until_grad,
+            is_final_year,
+            bool(survey_data.get('has_placement')),
+            bool(survey_data.get('has_experience')),
+            bool(survey_data.get('has_grad_offer')),
+            bool(survey_data.get('has_spring_weeks')),
+        )
@@ -0,0 +1,98 @@
+"""Signed tokens that carry survey progress between ``/api/survey/step`` calls.
+
+The answered fields and the current step are packed into a single integer and
+signed, so any worker holding the secret key can continue a survey without
+server-side session state.
+"""
+from itsdangerous import URLSafeSerializer
+
+from survey_constants import EducationStage, Sector, StepType
+from survey_processor import parse_year
+
+# Each field stores the index of its value; index 0 always means "unanswered"
+_BOOLEAN = (None, False, True)
+PACKED_FIELDS = (
+    ('current_step', (None, StepType.WELCOME, StepType.SECTOR, StepType.EDUCATION_STAGE,
+                      StepType.UNIVERSITY_TIMELINE, StepType.SPRING_WEEKS, StepType.SPRING_CONVERSION,
+                      StepType.INTERNSHIP_EXPERIENCE, StepType.GRAD_OFFER, StepType.FINAL)),
+    ('sector', (None,) + Sector.ALL),
+    ('education_stage', (None,) + EducationStage.ALL),
+    ('has_placement', _BOOLEAN),
+    ('has_spring_weeks', _BOOLEAN),
+    ('converted_spring_to_internship', _BOOLEAN),
+    ('has_experience', _BOOLEAN),
+    ('has_grad_offer', _BOOLEAN),
+)
+YEAR_FIELDS = ('start_year', 'graduation_year')
+# Years are stored as an offset from YEAR_BASE, with 0 meaning "unanswered"
+YEAR_BASE = 1990
+YEAR_BITS = 8
+
+
+def pack_survey(survey_data):
+    """Pack the answered fields of ``survey_data`` into an integer bitfield."""
+    packed = 0
+    shift = 0
+
+    for field, values in PACKED_FIELDS:
+        value = survey_data.get(field)
+        # The form blanks a question's field to '' each time it is shown
+        if value == '':
+            value = None
+        if value not in values:
+            raise ValueError(f"Invalid value for {field}: {value!r}")
+        packed |= values.index(value) << shift
+        shift += (len(values) - 1).bit_length()
+
+    for field in YEAR_FIELDS:
+        year = parse_year(survey_data.get(field))
+        if year:
+            offset = year - YEAR_BASE
+            if not 0 < offset < 1 << YEAR_BITS:
+                raise ValueError(f"Invalid value for {field}: {year!r}")
+            packed |= offset << shift
+        shift += YEAR_BITS
+
+    return packed
+
+
+def unpack_survey(packed):
+    """Rebuild the answered fields packed by ``pack_survey``."""
+    survey_data = {}
+
+    for field, values in PACKED_FIELDS:
+        bits = (len(values) - 1).bit_length()
+        index = packed & ((1 << bits) - 1)
+        if index >= len(values):
+            raise ValueError(f"Invalid value for {field}")
+        if index:
+            survey_data[field] = values[index]
+        packed >>= bits
+
+    for field in YEAR_FIELDS:
+        offset = packed & ((1 << YEAR_BITS) - 1)
+        if offset:
+            survey_data[field] = YEAR_BASE + offset
+        packed >>= YEAR_BITS
+
+    return survey_data
+
+
+class SurveyTokenSerializer:
+
+    def __init__(self, secret_key):
+        self._serializer = URLSafeSerializer(secret_key, salt='survey-step')
+
+    def dumps(self, survey_data):
+        return self._serializer.dumps(pack_survey(survey_data))
+
+    def loads(self, token):
+        """Return the survey fields in ``token``.
+
+        Raises ``itsdangerous.BadSignature`` if the token was not signed with
+        this secret key.
+        """
+        packed = self._serializer.loads(token)
+        if not isinstance(packed, int) or packed < 0:
+            raise ValueError("Malformed survey token")
+        return unpack_survey(packed)
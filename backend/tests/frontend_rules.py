@@ -0,0 +1,208 @@
+"""A plain port of ``SurveyProcessorService.processEligibility`` from the frontend.
+
+The compiled catalog must give the same recommendation as this branching
+code for every survey; commentary texts are read from ``rules/catalog.json``.
+"""
+import json
+
+from catalog import DEFAULT_SOURCE, EligibilityResult
+from survey_constants import EducationStage, Sector
+from survey_processor import parse_year
+
+COMMENTARY_TEXTS = json.loads(DEFAULT_SOURCE.read_text())['commentary']
+
+
+def _result(primary_tab, secondary_tabs=(), commentary=()):
+    # Missing commentary keys are dropped, like undefined values in JSON.stringify
+    return EligibilityResult(
+        primary_tab,
+        tuple(secondary_tabs),
+        tuple((tab, COMMENTARY_TEXTS[key]) for tab, key in commentary if key in COMMENTARY_TEXTS),
+    )
+
+
+def process_eligibility(survey_data, academic_year):
+    sector = survey_data.get('sector')
+    education_stage = survey_data.get('education_stage')
+    has_placement = survey_data.get('has_placement')
+    has_experience = survey_data.get('has_experience')
+
+    if education_stage == EducationStage.UNIVERSITY:
+        start_year = parse_year(survey_data.get('start_year'))
+        graduation_year = parse_year(survey_data.get('graduation_year'))
+        if not start_year or not graduation_year:
+            raise ValueError("Start year and graduation year are required")
+        year_of_study, years_until_grad = academic_year.timeline(start_year, graduation_year, has_placement)
+        return _process_university(
+            years_until_grad, year_of_study, graduation_year - start_year, has_placement,
+            survey_data.get('has_grad_offer'), has_experience, sector,
+        )
+    if education_stage == EducationStage.GRADUATE:
+        return _process_graduate(has_experience or has_placement, sector)
+
+    # High school, and the default for unknown stages
+    return _result('Pre-University', commentary=[
+        ('Pre-University', _get_sector_commentary_key('High School', sector)),
+    ])
+
+
+def _get_sector_commentary_key(base_key, sector=None):
+    if sector not in Sector.ALL:
+        return base_key
+
+    sector_key = {Sector.TECH: 'Tech', Sector.LAW: 'Law', Sector.FINANCE: 'Finance'}[sector] + ' ' + base_key
+    # Fall back to the base key when there is no sector-specific text
+    return sector_key if sector_key in COMMENTARY_TEXTS else base_key
+
+
+def _process_university(years_until_grad, year_of_study, total_duration, has_placement,
+                        has_grad_offer, has_experience, sector):
+    if years_until_grad is None or years_until_grad > 2:
+        return _process_early_university(has_placement, sector)
+
+    is_in_final_year = year_of_study >= total_duration
+
+    # Year 2 + industrial placement takes priority regardless of years until graduation
+    if year_of_study == 2 and has_placement:
+        if sector == Sector.FINANCE:
+            return _result('Industrial Placements', ['Off-Cycle Internships'], [
+                ('Industrial Placements', 'Finance Two Years Out Industrial Placement'),
+                ('Off-Cycle Internships', 'Finance Two Years Out Off-Cycle Internship'),
+            ])
+        return _result('Industrial Placements', commentary=[
+            ('Industrial Placements', 'Tech Two Years Out Industrial Placement'),
+        ])
+
+    # Exactly 2 years until graduation
+    if years_until_grad == 2:
+        if sector == Sector.FINANCE:
+            key = _get_sector_commentary_key('Two Years Out Spring', sector)
+            if has_placement:
+                return _result('Industrial Placements', ['Spring Weeks'], [('Industrial Placements', key)])
+            return _result('Spring Weeks', commentary=[('Spring Weeks', key)])
+        if sector == Sector.TECH:
+            if has_placement:
+                return _result('Industrial Placements', ['Insight Programmes'], [
+                    ('Insight Programmes', 'Tech Two Years From Grad'),
+                ])
+            return _result('Insight Programmes', commentary=[('Insight Programmes', 'Tech Two Years From Grad')])
+        if sector == Sector.LAW:
+            return _result('First Year Programmes', commentary=[('First Year Programmes', 'Law Two Years Out FYP')])
+        return _result('')
+
+    # Penultimate year, unless the degree finishes this year
+    if years_until_grad == 1 and not is_in_final_year:
+        if sector in (Sector.FINANCE, Sector.TECH):
+            secondary_tab = 'Spring Weeks' if sector == Sector.FINANCE else 'Insight Programmes'
+            return _result('Summer Internships', [secondary_tab], [
+                ('Summer Internships', _get_sector_commentary_key('Penultimate Summer Internship', sector)),
+                (secondary_tab, _get_sector_commentary_key('Penultimate Spring Week', sector)),
+            ])
+        if sector == Sector.LAW:
+            return _result('Vacation Schemes', ['Non-Law Internships'], [
+                ('Vacation Schemes', 'Law Penultimate Vacation'),
+                ('Non-Law Internships', 'Law Penultimate Non-Law Internships'),
+            ])
+        return _result('')
+
+    if is_in_final_year or years_until_grad == 0:
+        return _process_final_year(has_grad_offer, has_experience or has_placement, sector)
+
+    return _process_early_university(has_placement, sector)
+
+
+def _process_early_university(has_placement, sector):
+    if has_placement:
+        # Industrial Placements primary, Spring Weeks/Insight Programmes secondary
+        if sector in (Sector.FINANCE, Sector.LAW):
+            return _result('Industrial Placements', ['Spring Weeks'], [
+                ('Spring Weeks', _get_sector_commentary_key('More Than Two Years Out Spring', sector)),
+            ])
+        if sector == Sector.TECH:
+            return _result('Industrial Placements', ['Insight Programmes'], [
+                ('Insight Programmes', 'Tech More Than Two Years Out Spring'),
+            ])
+        return _result('Industrial Placements')
+
+    # No placement: Spring Weeks/Insight Programmes primary, no secondary
+    if sector == Sector.FINANCE:
+        return _result('Spring Weeks', commentary=[
+            ('Spring Weeks', _get_sector_commentary_key('More Than Two Years Out Spring', sector)),
+        ])
+    if sector == Sector.TECH:
+        return _result('Insight Programmes', commentary=[
+            ('Insight Programmes', 'Tech More Than Two Years Out Spring'),
+        ])
+    if sector == Sector.LAW:
+        return _result('First Year Schemes', commentary=[
+            ('First Year Schemes', 'Law More Than Two Years Out FYP'),
+        ])
+    return _result('')
+
+
+def _process_final_year(has_grad_offer, has_relevant_experience, sector):
+    if sector == Sector.FINANCE:
+        return _process_finance_final_year(has_grad_offer, has_relevant_experience)
+    if sector == Sector.TECH:
+        return _process_tech_final_year(has_grad_offer)
+    if sector == Sector.LAW:
+        return _process_final_law_year()
+    return _result('')
+
+
+def _process_finance_final_year(has_grad_offer, has_relevant_experience):
+    if has_grad_offer:
+        return _result('Graduate Schemes', ['Summer Internships', 'Off-Cycle Internships'], [
+            ('Graduate Schemes', 'Finance Final Year Grad Offer Grad Scheme'),
+            ('Summer Internships', 'Finance Final Year Grad Offer Summer Internship'),
+            ('Off-Cycle Internships', 'Finance Final Year Grad Offer Off-Cycle Internship'),
+        ])
+    if has_relevant_experience:
+        return _result('Off-Cycle Internships', ['Summer Internships', 'Graduate Schemes'], [
+            ('Off-Cycle Internships', 'Finance Final Year With Exp Off-Cycle Internship'),
+            ('Summer Internships', 'Finance Final Year With Exp Summer Internship'),
+            ('Graduate Schemes', 'Finance Final Year With Exp Grad Scheme'),
+        ])
+    return _result('Summer Internships', ['Off-Cycle Internships', 'Graduate Schemes'], [
+        ('Summer Internships', 'Finance Final Year No Exp Summer Internship'),
+        ('Graduate Schemes', 'Finance Final Year No Exp Grad Scheme'),
+        ('Off-Cycle Internships', 'Finance Final Year No Exp Off-Cycle Internship'),
+    ])
+
+
+def _process_tech_final_year(has_grad_offer):
+    if has_grad_offer:
+        return _result('Graduate Schemes', ['Summer Internships'], [
+            ('Graduate Schemes', 'Tech Final Year Grad Offer Grad Scheme'),
+            ('Summer Internships', 'Tech Final Year Grad Offer Summer Internship'),
+        ])
+    return _result('Graduate Schemes', ['Summer Internships'], [
+        ('Graduate Schemes', 'Tech Final Year Grad Scheme'),
+        ('Summer Internships', 'Tech Final Year Summer Internship'),
+    ])
+
+
+def _process_final_law_year():
+    return _result('Training Contracts', ['Vacation Schemes'], [
+        ('Training Contracts', 'Law Final Year Training Contracts'),
+        ('Vacation Schemes', 'Law Final Year Vacation'),
+    ])
+
+
+def _process_graduate(has_relevant_experience, sector):
+    if sector == Sector.FINANCE:
+        if has_relevant_experience:
+            return _result('Off-Cycle Internships', ['Graduate Schemes'], [
+                ('Off-Cycle Internships', 'Finance Grad With Exp Off-Cycle Internship'),
+                ('Graduate Schemes', 'Finance Grad With Exp Grad Scheme'),
+            ])
+        return _result('Graduate Schemes', ['Off-Cycle Internships'], [
+            ('Graduate Schemes', 'Finance Grad No Exp Grad Scheme'),
+            ('Off-Cycle Internships', 'Finance Grad No Exp Off-Cycle Internship'),
+        ])
+    if sector == Sector.TECH:
+        key = 'Tech Grad Exp Grad Scheme' if has_relevant_experience else 'Tech Grad No Exp Grad Scheme'
+        return _result('Graduate Schemes', commentary=[('Graduate Schemes', key)])
+    if sector == Sector.LAW:
+        return _result('Training Contracts', commentary=[('Training Contracts', 'Law Grad Training Contracts')])
+    return _result('')
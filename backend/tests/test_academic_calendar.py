@@ -0,0 +1,40 @@
+import itertools
+from datetime import date
+
+from academic_calendar import AcademicCalendar, AcademicYear
+
+
+def _year_of_study(academic_year, start_year, graduation_year, has_placement):
+    # Plain port of SurveyProcessorService.calculateYearOfStudy
+    year_of_study = academic_year - start_year + 1
+    total_duration = graduation_year - start_year
+    if has_placement and total_duration == 4:
+        if academic_year - start_year == 2:
+            return 3
+        if academic_year - start_year == 3:
+            return 4
+    return min(max(year_of_study, 1), total_duration)
+
+
+def test_timelines_match_frontend_calculation():
+    academic_year = AcademicYear(2025)
+
+    for start_year, graduation_year, has_placement in itertools.product(range(2000, 2040), range(2000, 2050), (False, True)):
+        assert academic_year.timeline(start_year, graduation_year, has_placement) == (
+            _year_of_study(2025, start_year, graduation_year, has_placement),
+            graduation_year - 2025 - 1,
+        )
+
+
+def test_calendar_rolls_over_in_june():
+    today = date(2026, 5, 31)
+    calendar = AcademicCalendar(lambda: today)
+    before = calendar.current()
+
+    assert before.year == 2025
+    assert calendar.current() is before
+
+    today = date(2026, 6, 1)
+    assert calendar.current().year == 2026
+    # A request holding the old snapshot keeps using it
+    assert before.timeline(2024, 2027, False) == (2, 1)
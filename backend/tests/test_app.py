@@ -0,0 +1,116 @@
+import re
+import time
+from datetime import date
+
+import app as survey_app
+from academic_calendar import AcademicCalendar
+from app import app, processor
+from metrics import SurveyMetrics
+from survey_constants import StepType
+
+GRADUATE = {'sector': 'Finance', 'education_stage': 'graduate', 'has_experience': 'true'}
+
+
+def test_survey_post_and_get_share_etag():
+    client = app.test_client()
+    posted = client.post('/api/survey', json={**GRADUATE, 'has_experience': True})
+    fetched = client.get('/api/survey', query_string=GRADUATE)
+
+    assert posted.status_code == fetched.status_code == 200
+    assert posted.get_json()['primary_tab'] == 'Off-Cycle Internships'
+    assert posted.get_data() == fetched.get_data()
+    assert posted.headers['ETag'] == fetched.headers['ETag']
+
+
+def test_survey_get_revalidates_with_304():
+    client = app.test_client()
+    etag = client.get('/api/survey', query_string=GRADUATE).headers['ETag']
+
+    response = client.get('/api/survey', query_string=GRADUATE, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_survey_reports_missing_years():
+    response = app.test_client().post('/api/survey', json={'sector': 'Law', 'education_stage': 'university'})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': "Start year and graduation year are required"}
+
+
+def test_step_uses_one_academic_year_throughout(monkeypatch):
+    # The academic year rolls over after the first calendar read
+    days = iter([date(2026, 5, 31)])
+    monkeypatch.setattr(processor, 'calendar', AcademicCalendar(lambda: next(days, date(2026, 6, 1))))
+
+    response = app.test_client().post('/api/survey/step', json={
+        'current_step': StepType.SPRING_CONVERSION, 'sector': 'Finance', 'education_stage': 'university',
+        'start_year': 2024, 'graduation_year': 2028, 'has_spring_weeks': True,
+        'converted_spring_to_internship': False,
+    }).get_json()
+
+    assert response['next_step'] == StepType.INTERNSHIP_EXPERIENCE
+    assert {answer['next_step'] for answer in response['answers'].values()} == {StepType.FINAL}
+
+
+def test_career_paths_come_from_catalog():
+    client = app.test_client()
+    response = client.get('/api/career-paths')
+
+    assert response.status_code == 200
+    assert 'Training Contracts' in response.get_json()
+    assert client.get('/api/career-paths', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_metrics_count_recommendations_by_branch():
+    client = app.test_client()
+    client.post('/api/survey', json={**GRADUATE, 'has_experience': True})
+
+    response = client.get('/metrics')
+    body = response.get_data(as_text=True)
+    assert response.mimetype == 'text/plain'
+    assert 'survey_recommendations_total{sector="Finance",branch="graduate_experience",' \
+           'primary_tab="Off-Cycle Internships"}' in body
+    for stage in ('parse', 'year_of_study', 'lookup', 'encode'):
+        assert f'survey_stage_duration_seconds_count{{stage="{stage}"}}' in body
+
+
+def test_recording_a_recommendation_is_not_timed_as_a_stage(monkeypatch):
+    metrics = SurveyMetrics()
+    monkeypatch.setattr(survey_app, 'metrics', metrics)
+    monkeypatch.setattr(metrics, 'record_recommendation', lambda *args: time.sleep(0.05))
+
+    app.test_client().post('/api/survey', json=GRADUATE)
+
+    sums = re.findall(r'survey_stage_duration_seconds_sum\{stage="\w+"\} (\S+)', metrics.render())
+    assert len(sums) == 4 and all(float(total) < 0.05 for total in sums)
+
+
+def test_profile_header_writes_a_profile(tmp_path, monkeypatch):
+    client = app.test_client()
+    monkeypatch.setitem(app.config, 'PROFILE_TOKEN', 'let-me-profile')
+    assert 'X-Profile' not in client.post('/api/survey', json=GRADUATE, headers={'X-Profile': 'let-me-profile'}).headers
+
+    monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path))
+    assert 'X-Profile' not in client.post('/api/survey', json=GRADUATE, headers={'X-Profile': '1'}).headers
+    response = client.post('/api/survey', json=GRADUATE, headers={'X-Profile': 'let-me-profile'})
+    response.close()
+
+    assert (tmp_path / response.headers['X-Profile']).exists()
+
+
+def test_profiles_are_recorded_one_at_a_time(tmp_path, monkeypatch):
+    client = app.test_client()
+    monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setitem(app.config, 'PROFILE_TOKEN', 'let-me-profile')
+
+    # The first response hasn't been closed, so its profile is still running
+    first = client.post('/api/survey', json=GRADUATE, headers={'X-Profile': 'let-me-profile'})
+    second = client.post('/api/survey', json=GRADUATE, headers={'X-Profile': 'let-me-profile'})
+    assert 'X-Profile' in first.headers and 'X-Profile' not in second.headers
+
+    first.close()
+    third = client.post('/api/survey', json=GRADUATE, headers={'X-Profile': 'let-me-profile'})
+    third.close()
+    assert 'X-Profile' in third.headers
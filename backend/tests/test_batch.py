@@ -0,0 +1,82 @@
+import io
+import json
+from datetime import date
+
+from academic_calendar import AcademicCalendar
+from app import app
+from batch import CHUNK_SIZE, evaluate_records, main, read_records
+from survey_processor import SurveyProcessor
+
+JSONL = b"""{"sector": "Finance", "education_stage": "graduate", "has_experience": true}
+
+{"sector": "Law", "education_stage": "university"}
+not json
+["Finance"]
+{"sector": "Technology", "education_stage": "high school"}
+"""
+
+CSV = b"""sector,education_stage,start_year,graduation_year,has_experience,has_placement
+Finance,graduate,,,true,
+Finance,graduate,,,false,no
+"""
+
+
+def _evaluate(data, fmt):
+    output = b''.join(evaluate_records(SurveyProcessor(), read_records(io.BytesIO(data), fmt)))
+    return [json.loads(line) for line in output.splitlines()]
+
+
+def test_jsonl_results_stay_in_input_order():
+    results = _evaluate(JSONL, 'jsonl')
+
+    assert [result.get('primary_tab') for result in results] == [
+        'Off-Cycle Internships', None, None, None, 'Pre-University',
+    ]
+    assert results[1] == {'error': "Start year and graduation year are required"}
+    assert results[2]['error'].startswith("Invalid JSON")
+    assert results[3] == {'error': "Record must be a JSON object"}
+
+
+def test_csv_booleans_are_parsed():
+    results = _evaluate(CSV, 'csv')
+
+    assert [result['primary_tab'] for result in results] == ['Off-Cycle Internships', 'Graduate Schemes']
+
+
+def test_batch_endpoint_streams_ndjson():
+    response = app.test_client().post('/api/survey/batch', data=CSV, content_type='text/csv')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert len(response.get_data().splitlines()) == 2
+
+
+def test_cli_writes_ndjson(tmp_path):
+    source = tmp_path / 'students.jsonl'
+    source.write_bytes(JSONL)
+    target = tmp_path / 'results.ndjson'
+
+    main([str(source), '-o', str(target)])
+
+    assert len(target.read_bytes().splitlines()) == 5
+
+
+def test_csv_bad_rows_get_error_lines():
+    data = b'sector,education_stage\nFinance,graduate\n\xff\xfe,graduate\n"Law"x,graduate\nLaw,graduate\n'
+    results = _evaluate(data, 'csv')
+
+    assert results[0]['primary_tab'] == 'Graduate Schemes'
+    assert results[1] == {'error': "Invalid UTF-8 in CSV row"}
+    assert results[2]['error'].startswith("Invalid CSV")
+    assert results[3]['primary_tab'] == 'Training Contracts'
+
+
+def test_batch_uses_one_academic_year_throughout():
+    # The academic year rolls over after the first calendar read
+    days = iter([date(2026, 5, 31)])
+    processor = SurveyProcessor(AcademicCalendar(lambda: next(days, date(2026, 6, 1))))
+    record = {'sector': 'Law', 'education_stage': 'university', 'start_year': 2024, 'graduation_year': 2027}
+
+    output = b''.join(evaluate_records(processor, [record] * (CHUNK_SIZE + 1)))
+
+    assert len(set(output.splitlines())) == 1
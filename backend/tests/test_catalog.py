@@ -0,0 +1,140 @@
+import json
+import shutil
+
+import pytest
+
+from catalog import _DIRECTORY_ENTRY, _HEADER, DEFAULT_SOURCE, Catalog, CatalogLoader, compile_catalog
+from survey_constants import EducationStage, Sector
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'catalog.json'
+    shutil.copy(DEFAULT_SOURCE, path)
+    return path
+
+
+def _edit(path, edit):
+    catalog = json.loads(path.read_text())
+    edit(catalog)
+    path.write_text(json.dumps(catalog))
+
+
+def _graduate_key(sector):
+    return (sector, EducationStage.GRADUATE, None, None, False, False, False, False, False)
+
+
+def test_results_are_interned(source):
+    compile_catalog(source, source.with_suffix('.bin'))
+    catalog = Catalog(source.with_suffix('.bin'))
+
+    payloads = [catalog.payload(result_id) for result_id in range(catalog.result_count)]
+    assert len(set(payloads)) == len(payloads)
+    assert len(set(catalog.etags)) == len(catalog.etags)
+    assert catalog.sectors == (Sector.FINANCE, Sector.TECH, Sector.LAW)
+
+
+def test_sector_commentary_falls_back_to_base_key(source):
+    compile_catalog(source, source.with_suffix('.bin'))
+    catalog = Catalog(source.with_suffix('.bin'))
+    texts = json.loads(source.read_text())['commentary']
+
+    result = catalog.result(catalog.result_id(
+        (Sector.FINANCE, EducationStage.HIGH_SCHOOL, None, None, False, False, False, False, False),
+    ))
+    assert result.commentary == (('Pre-University', texts['Finance High School']),)
+
+
+def test_unknown_sector_gets_default_outcomes(source):
+    compile_catalog(source, source.with_suffix('.bin'))
+    catalog = Catalog(source.with_suffix('.bin'))
+
+    assert catalog.result(catalog.result_id(_graduate_key('Medicine'))).primary_tab == ''
+    assert catalog.result_id(_graduate_key('Medicine')) == catalog.result_id(_graduate_key(None))
+
+
+def test_new_sector_needs_no_code_change(source):
+    def add_sector(catalog):
+        catalog['sectors']['Medicine'] = {
+            'commentary_prefix': 'Law',
+            'outcomes': catalog['sectors'][Sector.LAW]['outcomes'],
+        }
+    _edit(source, add_sector)
+    compile_catalog(source, source.with_suffix('.bin'))
+    catalog = Catalog(source.with_suffix('.bin'))
+
+    assert catalog.result(catalog.result_id(_graduate_key('Medicine'))).primary_tab == 'Training Contracts'
+
+
+def test_compile_rejects_unknown_commentary(source):
+    _edit(source, lambda catalog: catalog['sectors'][Sector.LAW]['outcomes']['graduate']['commentary'].update(
+        {'Training Contracts': 'No Such Text'},
+    ))
+    with pytest.raises(ValueError, match='No Such Text'):
+        compile_catalog(source, source.with_suffix('.bin'))
+
+
+def test_compile_rejects_missing_outcome(source):
+    _edit(source, lambda catalog: catalog['sectors'][Sector.TECH]['outcomes'].pop('penultimate'))
+    with pytest.raises(ValueError, match='penultimate'):
+        compile_catalog(source, source.with_suffix('.bin'))
+
+
+def test_truncated_file_is_rejected(source):
+    target = source.with_suffix('.bin')
+    compile_catalog(source, target)
+    target.write_bytes(target.read_bytes()[:-1])
+
+    with pytest.raises(ValueError):
+        Catalog(target)
+
+
+def test_file_truncated_mid_directory_is_rejected(source):
+    target = source.with_suffix('.bin')
+    loader = CatalogLoader.from_source(source, check_interval=0)
+    old = loader.current()
+    data = target.read_bytes()
+    _, meta_length, entry_count, _, _ = _HEADER.unpack_from(data)
+    directory = _HEADER.size + meta_length + entry_count * 2
+    target.write_bytes(data[:directory + _DIRECTORY_ENTRY.size * 2 + 5])
+
+    with pytest.raises(ValueError, match='truncated'):
+        Catalog(target)
+    assert loader.current() is old
+
+
+def test_file_without_version_is_rejected(source):
+    target = source.with_suffix('.bin')
+    compile_catalog(source, target)
+    # Same length, so every offset in the file stays valid
+    target.write_bytes(target.read_bytes().replace(b'"version"', b'"versiom"', 1))
+
+    with pytest.raises(ValueError, match='version'):
+        Catalog(target)
+
+
+def test_loader_swaps_to_recompiled_catalog(source):
+    loader = CatalogLoader.from_source(source, check_interval=0)
+    old = loader.current()
+    old_payload = old.payload(old.result_id(_graduate_key(Sector.LAW)))
+
+    _edit(source, lambda catalog: catalog['commentary'].update({'Law Grad Training Contracts': "Apply now."}))
+    compile_catalog(source, source.with_suffix('.bin'))
+    new = loader.current()
+
+    assert new is not old and new.version != old.version
+    assert new.result(new.result_id(_graduate_key(Sector.LAW))).commentary == (('Training Contracts', "Apply now."),)
+    # Requests still holding the old catalog keep reading it intact
+    assert old.payload(old.result_id(_graduate_key(Sector.LAW))) == old_payload
+
+
+def test_loader_keeps_serving_through_a_bad_file(source):
+    loader = CatalogLoader.from_source(source, check_interval=0)
+    old = loader.current()
+
+    payload = old.payload(old.result_id(_graduate_key(Sector.LAW)))
+
+    # Overwritten in place rather than renamed, so the old file's contents are gone
+    source.with_suffix('.bin').write_bytes(b'not a catalog')
+    assert loader.current() is old
+    assert old.payload(old.result_id(_graduate_key(Sector.LAW))) == payload
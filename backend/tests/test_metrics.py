@@ -0,0 +1,68 @@
+import time
+
+from metrics import Counter, Histogram, SamplingProfiler, SurveyMetrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('stage_seconds', "Stage latency.", ('stage',), buckets=(0.1, 1))
+    histogram.observe(0.05, 'parse')
+    histogram.observe(0.5, 'parse')
+    histogram.observe(5, 'parse')
+
+    assert histogram.render() == [
+        '# HELP stage_seconds Stage latency.',
+        '# TYPE stage_seconds histogram',
+        'stage_seconds_bucket{stage="parse",le="0.1"} 1',
+        'stage_seconds_bucket{stage="parse",le="1"} 2',
+        'stage_seconds_bucket{stage="parse",le="+Inf"} 3',
+        'stage_seconds_sum{stage="parse"} 5.55',
+        'stage_seconds_count{stage="parse"} 3',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter('hits_total', "Hits.", ('tab',))
+    counter.inc('Say "hi"\\now')
+
+    assert counter.render()[-1] == 'hits_total{tab="Say \\"hi\\"\\\\now"} 1'
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = SurveyMetrics(enabled=False)
+    stages = metrics.stopwatch()
+    stages.lap('parse')
+    metrics.record_recommendation(None, None, None)
+
+    assert metrics.stage_seconds.count('parse') == 0
+    assert 'survey_stage_duration_seconds_bucket' not in metrics.render()
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profiler_samples_the_calling_thread(tmp_path):
+    profiler = SamplingProfiler(tmp_path, interval=0.001).start()
+    _busy(0.1)
+    path = profiler.stop()
+
+    stacks = path.read_text().splitlines()
+    assert path.parent == tmp_path
+    assert any('test_metrics.py:_busy' in stack for stack in stacks)
+
+
+def test_shared_metrics_render_the_total_over_processes(tmp_path):
+    # Stand-ins for two worker processes writing to the same directory
+    workers = [SurveyMetrics(), SurveyMetrics()]
+    for metrics in workers:
+        metrics.share(tmp_path, interval=60)
+        metrics.stage_seconds.observe(0.5, 'parse')
+        metrics.recommendations.inc('Law', 'graduate', 'Training Contracts')
+    workers[1].flush()
+
+    for metrics in workers:
+        body = metrics.render()
+        assert 'survey_recommendations_total{sector="Law",branch="graduate",primary_tab="Training Contracts"} 2' in body
+        assert 'survey_stage_duration_seconds_count{stage="parse"} 2' in body
@@ -0,0 +1,82 @@
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from serve import ConcurrencyLimiter, RestartBackoff, _signal_all
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def test_limiter_rejects_requests_beyond_the_cap():
+    client = Client(ConcurrencyLimiter(Response('ok'), max_concurrent=1))
+
+    # An unclosed streamed response keeps holding its slot
+    held = client.get('/', buffered=False)
+    rejected = client.get('/')
+    assert held.status_code == 200
+    assert rejected.status_code == 503
+    assert rejected.headers['Retry-After'] == '1'
+
+    held.close()
+    assert client.get('/').status_code == 200
+
+
+def test_restart_backoff_doubles_then_gives_up():
+    backoff = RestartBackoff(initial=0.1, maximum=0.5, max_crashes=5, window=60)
+
+    assert [backoff.crashed(now) for now in range(4)] == [0.1, 0.2, 0.4, 0.5]
+    assert backoff.crashed(4) is None
+
+
+def test_restart_backoff_forgets_old_crashes():
+    backoff = RestartBackoff(initial=0.1, max_crashes=3, window=60)
+
+    assert [backoff.crashed(now) for now in (0, 1)] == [0.1, 0.2]
+    # The first two crashes are out of the window by now
+    assert backoff.crashed(100) == 0.1
+
+
+def test_signalling_skips_reaped_workers():
+    worker = subprocess.Popen([sys.executable, '-c', 'pass'])
+    worker.wait()
+
+    _signal_all({worker.pid}, signal.SIGTERM)
+
+
+def test_serve_forks_workers_and_shuts_down_gracefully():
+    server = subprocess.Popen(
+        [sys.executable, 'serve.py', '--port', '0', '--workers', '3'],
+        cwd=BACKEND, stdout=subprocess.PIPE, text=True,
+        env={**os.environ, 'FLASK_SECRET_KEY': 'test'},
+    )
+    try:
+        url = re.search(r'http://\S+', server.stdout.readline()).group()
+        request = urllib.request.Request(
+            f'{url}/api/survey', json.dumps({'sector': 'Law', 'education_stage': 'graduate'}).encode(),
+            {'Content-Type': 'application/json'},
+        )
+        for _ in range(9):
+            with urllib.request.urlopen(request, timeout=5) as response:
+                assert json.load(response)['primary_tab'] == 'Training Contracts'
+
+        # Every worker has flushed its metrics after a second, so each scrape
+        # reports the totals whichever worker answers it
+        time.sleep(1.5)
+        for _ in range(4):
+            with urllib.request.urlopen(f'{url}/metrics', timeout=5) as response:
+                assert 'primary_tab="Training Contracts"} 9' in response.read().decode()
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=10) == 0
+    finally:
+        server.kill()
+        server.stdout.close()
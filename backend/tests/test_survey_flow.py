@@ -0,0 +1,49 @@
+from datetime import date
+
+import pytest
+
+from app import app
+from academic_calendar import AcademicCalendar
+from survey_constants import EducationStage, Sector, StepType
+from survey_flow import build_flow_graph
+from survey_processor import SurveyProcessor
+
+
+@pytest.mark.parametrize('today', [date(2026, 1, 15), date(2026, 6, 1), date(2026, 9, 15)])
+def test_every_edge_matches_processor(today):
+    graph = build_flow_graph(SurveyProcessor(AcademicCalendar(lambda: today)))
+
+    for edges in graph['edges'].values():
+        for edge in edges:
+            assert set(edge['question']) == set(Sector.ALL), edge
+
+
+def test_flow_graph_is_served_by_version():
+    client = app.test_client()
+    response = client.get('/api/survey/flow')
+    version = response.get_json()['version']
+
+    assert response.headers['ETag'] == f'"{version}"'
+    assert client.get('/api/survey/flow', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    versioned = client.get(f'/api/survey/flow/{version}.json')
+    assert versioned.get_data() == response.get_data()
+    assert 'immutable' in versioned.headers['Cache-Control']
+    assert client.get('/api/survey/flow/0000.json').status_code == 404
+
+
+def test_step_prefetches_answers_and_previous():
+    client = app.test_client()
+    response = client.post('/api/survey/step', json={'current_step': StepType.SECTOR, 'sector': Sector.LAW}).get_json()
+
+    assert response['next_step'] == StepType.EDUCATION_STAGE
+    assert set(response['answers']) == set(EducationStage.ALL)
+    assert response['previous']['next_step'] == StepType.SECTOR
+
+    prefetched = response['answers'][EducationStage.GRADUATE]
+    followed = client.post('/api/survey/step', json={
+        'token': response['token'],
+        'education_stage': EducationStage.GRADUATE,
+    }).get_json()
+    assert followed['next_step'] == prefetched['next_step'] == StepType.INTERNSHIP_EXPERIENCE
+    assert followed['token'] == prefetched['token']
@@ -0,0 +1,107 @@
+import itertools
+from datetime import date
+
+import pytest
+
+import frontend_rules
+from academic_calendar import AcademicCalendar
+from survey_constants import EducationStage, Sector, StepType
+from survey_processor import SurveyProcessor
+
+
+@pytest.fixture(scope='module')
+def processor():
+    return SurveyProcessor(AcademicCalendar(lambda: date(2026, 3, 1)))
+
+
+def _survey_inputs(academic_year):
+    sectors = Sector.ALL + (None, 'Unknown')
+    flag_values = (True, False, None)
+    flags = list(itertools.product(flag_values, repeat=4))
+    start_years = range(academic_year - 7, academic_year + 2)
+
+    for sector, (has_placement, has_experience, has_grad_offer, has_spring_weeks) in itertools.product(sectors, flags):
+        base = {
+            'sector': sector,
+            'has_placement': has_placement,
+            'has_experience': has_experience,
+            'has_grad_offer': has_grad_offer,
+            'has_spring_weeks': has_spring_weeks,
+        }
+        for education_stage in EducationStage.ALL + (None, 'postgraduate'):
+            yield {**base, 'education_stage': education_stage}
+        for start_year in start_years:
+            for graduation_year in range(start_year - 1, start_year + 9):
+                yield {
+                    **base,
+                    'education_stage': EducationStage.UNIVERSITY,
+                    'start_year': str(start_year),
+                    'graduation_year': graduation_year,
+                }
+
+
+def _outcome(evaluate, survey_data):
+    try:
+        return evaluate(survey_data)
+    except ValueError as error:
+        return str(error)
+
+
+def test_catalog_matches_branching_rules(processor):
+    academic_year = processor.calendar.current()
+    checked = 0
+
+    for survey_data in _survey_inputs(academic_year.year):
+        expected = _outcome(lambda data: frontend_rules.process_eligibility(data, academic_year), survey_data)
+        assert _outcome(processor.process_eligibility, survey_data) == expected, survey_data
+        checked += 1
+
+    assert checked > 30_000
+
+
+def test_university_requires_years(processor):
+    with pytest.raises(ValueError):
+        processor.process_eligibility({'sector': Sector.FINANCE, 'education_stage': EducationStage.UNIVERSITY})
+
+
+def test_final_year_finance_with_grad_offer(processor):
+    academic_year = processor.calendar.current().year
+    result = processor.process_eligibility({
+        'sector': Sector.FINANCE,
+        'education_stage': EducationStage.UNIVERSITY,
+        'start_year': academic_year - 2,
+        'graduation_year': academic_year + 1,
+        'has_grad_offer': True,
+    })
+
+    assert result.to_dict() == {
+        'primary_tab': 'Graduate Schemes',
+        'secondary_tabs': ['Summer Internships', 'Off-Cycle Internships'],
+        'commentary': {
+            'Graduate Schemes': result.commentary[0][1],
+            'Summer Internships': result.commentary[1][1],
+            'Off-Cycle Internships': result.commentary[2][1],
+        },
+    }
+
+
+def test_previous_step_returns_to_spring_conversion(processor):
+    response = processor.get_next_step({
+        'current_step': StepType.INTERNSHIP_EXPERIENCE,
+        'is_previous': True,
+        'sector': Sector.TECH,
+        'has_spring_weeks': True,
+        'converted_spring_to_internship': False,
+    })
+
+    assert response['next_step'] == StepType.SPRING_CONVERSION
+    assert response['question'] == "Did you convert your Insight Programme to a Summer Internship?"
+
+
+def test_timeline_step_without_years_reports_error(processor):
+    response = processor.get_next_step({'current_step': StepType.UNIVERSITY_TIMELINE})
+
+    assert response == {
+        'next_step': StepType.UNIVERSITY_TIMELINE,
+        'error': "Error processing step: Start year and graduation year are required",
+    }
@@ -0,0 +1,125 @@
+from datetime import date
+
+import pytest
+from itsdangerous import BadSignature
+
+from academic_calendar import AcademicCalendar
+from app import app, processor, step_tokens
+from survey_constants import EducationStage, Sector, StepType
+from survey_token import SurveyTokenSerializer, pack_survey, unpack_survey
+
+
+def test_pack_round_trip():
+    survey_data = {
+        'current_step': StepType.INTERNSHIP_EXPERIENCE,
+        'sector': Sector.LAW,
+        'education_stage': EducationStage.UNIVERSITY,
+        'start_year': 2023,
+        'graduation_year': 2026,
+        'has_placement': False,
+        'has_spring_weeks': True,
+        'converted_spring_to_internship': False,
+    }
+
+    assert unpack_survey(pack_survey(survey_data)) == survey_data
+
+
+@pytest.mark.parametrize('survey_data', [
+    {'sector': 'Medicine'},
+    {'has_experience': 'yes'},
+    {'start_year': 1900},
+])
+def test_pack_rejects_unrepresentable_values(survey_data):
+    with pytest.raises(ValueError):
+        pack_survey(survey_data)
+
+
+def test_token_is_signed():
+    token = SurveyTokenSerializer('secret').dumps({'sector': Sector.TECH})
+
+    assert SurveyTokenSerializer('secret').loads(token) == {'sector': Sector.TECH}
+    with pytest.raises(BadSignature):
+        SurveyTokenSerializer('other secret').loads(token)
+
+
+def test_step_endpoint_needs_only_the_token_and_new_answers():
+    client = app.test_client()
+
+    def step(**fields):
+        response = client.post('/api/survey/step', json=fields).get_json()
+        return response, {'token': response['token']}
+
+    response, state = step(current_step=StepType.WELCOME)
+    assert response['next_step'] == StepType.SECTOR
+    response, state = step(**state, sector=Sector.TECH)
+    response, state = step(**state, education_stage=EducationStage.GRADUATE)
+    assert response['next_step'] == StepType.INTERNSHIP_EXPERIENCE
+    response, state = step(**state, has_experience=True)
+    assert response['next_step'] == StepType.GRAD_OFFER
+
+    response, _ = step(**state, is_previous=True)
+    assert response['next_step'] == StepType.INTERNSHIP_EXPERIENCE
+
+
+def test_recommendation_from_the_token_alone(monkeypatch):
+    monkeypatch.setattr(processor, 'calendar', AcademicCalendar(lambda: date(2026, 3, 1)))
+    client = app.test_client()
+    answers = [
+        {'current_step': StepType.WELCOME},
+        {'sector': Sector.FINANCE},
+        {'education_stage': EducationStage.UNIVERSITY},
+        {'start_year': 2024, 'graduation_year': 2027, 'has_placement': False},
+        {'has_spring_weeks': True},
+        {'converted_spring_to_internship': True},
+    ]
+    state = {}
+    for fields in answers:
+        response = client.post('/api/survey/step', json={**state, **fields}).get_json()
+        state = {'token': response['token']}
+    assert response['next_step'] == StepType.GRAD_OFFER
+    # Converting the spring week counts as experience
+    assert step_tokens.loads(state['token'])['has_experience'] is True
+
+    posted = client.post('/api/survey', json=state)
+    fetched = client.get('/api/survey', query_string=state)
+    assert posted.get_json()['primary_tab'] == 'Summer Internships'
+    assert posted.get_data() == fetched.get_data()
+    assert client.post('/api/survey', json={'token': 'MTIz.forged'}).status_code == 400
+
+
+def test_step_endpoint_rejects_tampered_token():
+    response = app.test_client().post('/api/survey/step', json={'token': 'MTIz.forged'})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': "Invalid survey token"}
+
+
+@pytest.mark.parametrize('payload, next_step', [
+    # SurveyFormComponent blanks the field of the question it is showing, then
+    # sends all of surveyData when moving on or back
+    ({'current_step': StepType.SECTOR, 'sector': '', 'is_previous': True}, StepType.WELCOME),
+    ({'current_step': StepType.SECTOR, 'sector': ''}, StepType.SECTOR),
+    ({'current_step': StepType.EDUCATION_STAGE, 'sector': Sector.LAW, 'education_stage': '', 'is_previous': True},
+     StepType.SECTOR),
+    ({'current_step': StepType.UNIVERSITY_TIMELINE, 'sector': Sector.LAW,
+      'education_stage': EducationStage.UNIVERSITY, 'start_year': '', 'graduation_year': ''},
+     StepType.UNIVERSITY_TIMELINE),
+])
+def test_step_endpoint_accepts_blank_form_fields(payload, next_step):
+    response = app.test_client().post('/api/survey/step', json=payload)
+
+    assert response.status_code == 200
+    assert response.get_json()['next_step'] == next_step
+
+
+def test_step_blank_sector_asks_again():
+    response = app.test_client().post('/api/survey/step', json={'current_step': StepType.SECTOR, 'sector': ''})
+
+    assert response.get_json()['error'] == "Please select a sector"
+
+
+def test_step_endpoint_rejects_non_string_token():
+    response = app.test_client().post('/api/survey/step', json={'token': 123})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': "Invalid survey token"}
@@ -378,16 +378,7 @@ export class SurveyProcessorService {
     if (!graduationYear) return null;
     
     const academicYear = this.getCurrentAcademicYear();
-    const yearsUntilGrad = graduationYear - academicYear - 1;
-    
-    console.log('Academic Year Calculation:', {
-      currentDate: new Date(),
-      academicYear: academicYear,
-      graduationYear: graduationYear,
-      yearsUntilGraduation: yearsUntilGrad
-    });
-    
-    return yearsUntilGrad;
+    return graduationYear - academicYear - 1;
   }
 
   calculateYearOfStudy(surveyData: any): number {